@@ -0,0 +1,2 @@
+# Lets plain `pytest` import the top-level modules: pytest puts the
+# directory of a rootdir conftest.py on sys.path
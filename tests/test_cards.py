@@ -0,0 +1,77 @@
+import os
+import shutil
+import threading
+from pathlib import Path
+
+import pytest
+
+from travel_agent_tkinter import SimpleTravelAgent, render_destination_card
+
+KB = Path(__file__).resolve().parent.parent / 'travel_kb.pl'
+
+
+@pytest.fixture
+def agent(tmp_path):
+    kb_path = tmp_path / 'travel_kb.pl'
+    shutil.copy(KB, kb_path)
+    return SimpleTravelAgent(kb_path=str(kb_path), fast_path=True)
+
+
+def touch(path, step):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + step * 1000000))
+
+
+def test_cards_match_direct_render(agent):
+    destinations = agent.recommend_destinations()
+    seasons = agent.get_best_season_batch(destinations)
+    similar = agent.similar_destinations_batch(destinations, 3, 300)
+    expected = [render_destination_card(dest, season, names)
+                for dest, season, names in zip(destinations, seasons, similar)]
+    assert agent.render_cards(destinations) == expected
+    assert agent.render_cards(destinations) == expected
+
+
+def test_render_all_cards_fills_cache(agent):
+    agent.render_all_cards()
+    assert len(agent._cards) == len(agent.facts.destinations)
+
+
+def test_reprice_invalidates_cards(agent):
+    paris = [dest for dest in agent.recommend_destinations() if dest['name'] == 'paris']
+    before = agent.render_cards(paris)
+    agent.apply_delta([{'op': 'reprice', 'name': 'paris', 'cost': 1150}])
+    paris = [dest for dest in agent.recommend_destinations() if dest['name'] == 'paris']
+    assert agent.render_cards(paris) != before
+    assert '1150' in agent.render_cards(paris)[0]
+
+
+def test_render_during_reload_and_delta(agent):
+    # A reload (KB file changed on disk) takes _lock; deltas take _lock then
+    # _index_lock, so rendering must not reload while holding _index_lock
+    destinations = agent.recommend_destinations()
+    errors = []
+
+    def deltas():
+        try:
+            for step in range(200):
+                agent.apply_delta([{'op': 'reprice', 'name': 'paris', 'cost': 800 + step}])
+        except Exception as e:
+            errors.append(e)
+
+    def renders():
+        try:
+            for step in range(200):
+                touch(agent.kb_path, step + 1)
+                agent.render_cards(destinations)
+                agent.render_all_cards()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=deltas, daemon=True), threading.Thread(target=renders, daemon=True)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+    assert not any(thread.is_alive() for thread in threads), "deadlocked"
+    assert errors == []
@@ -0,0 +1,139 @@
+import shutil
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+from travel_agent_tkinter import SimpleTravelAgent
+from travel_delta import DeltaWatcher
+
+KB = Path(__file__).resolve().parent.parent / 'travel_kb.pl'
+
+
+class FakeProlog:
+    """Stands in for pyswip.Prolog: a set of facts, retract raising StopIteration on a miss"""
+
+    def __init__(self):
+        self.facts = set()
+        self.calls = []
+
+    def consult(self, path):
+        pass
+
+    def assertz(self, fact):
+        self.calls.append(('assertz', fact))
+        self.facts.add(fact)
+
+    def retract(self, fact):
+        self.calls.append(('retract', fact))
+        if fact not in self.facts:
+            raise StopIteration
+        self.facts.remove(fact)
+
+
+@pytest.fixture
+def agent(tmp_path):
+    kb_path = tmp_path / 'travel_kb.pl'
+    shutil.copy(KB, kb_path)
+    return SimpleTravelAgent(kb_path=str(kb_path), fast_path=True)
+
+
+@pytest.fixture
+def fake_pyswip(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'pyswip', types.SimpleNamespace(Prolog=FakeProlog))
+
+
+def names(agent):
+    return {dest['name'] for dest in agent.facts.destinations}
+
+
+def test_add(agent):
+    changed = agent.apply_delta([{'op': 'add', 'name': 'oslo', 'country': 'norway', 'continent': 'europe',
+                                  'type': 'city', 'cost': 900, 'seasons': ['summer'],
+                                  'activities': ['museums', 'fjord_cruises']}])
+    assert changed == 3
+    assert 'oslo' in names(agent)
+    assert agent.index.row(agent.index.row_ids['oslo'])['cost'] == 900
+    assert agent.facts.best_seasons['oslo'] == ['summer']
+    assert agent.facts.activities['oslo'] == ['museums', 'fjord_cruises']
+
+
+def test_remove(agent):
+    assert agent.apply_delta([{'op': 'remove', 'name': 'paris'}]) == 4
+    assert 'paris' not in names(agent)
+    assert 'paris' not in agent.index.row_ids
+    assert 'paris' not in agent.facts.best_seasons
+    assert 'paris' not in agent.facts.activities
+
+
+def test_reprice(agent):
+    assert agent.apply_delta([{'op': 'reprice', 'name': 'paris', 'cost': 1150}]) == 2
+    assert agent.index.row(agent.index.row_ids['paris'])['cost'] == 1150
+    assert [dest['cost'] for dest in agent.facts.destinations if dest['name'] == 'paris'] == [1150]
+
+
+def test_noop_retract(agent):
+    assert agent.apply_delta([{'op': 'remove_season', 'name': 'paris', 'season': 'winter'}]) == 0
+    assert agent._fact_journal == []
+
+
+def test_noop_retract_with_engine(agent, fake_pyswip):
+    engine = agent.prolog
+    # Kept facts are checked on the Python side and never reach the engine
+    assert agent.apply_delta([{'op': 'retract', 'fact': 'budget_level(lavish, 1, 2)'}]) == 0
+    assert agent.apply_delta([{'op': 'remove_season', 'name': 'paris', 'season': 'winter'}]) == 0
+    assert engine.calls == []
+    # Others only live in the engine, whose retract raises StopIteration on a miss
+    assert agent.apply_delta([{'op': 'retract', 'fact': 'visa_free(paris)'}]) == 0
+    assert engine.calls == [('retract', "visa_free('paris')")]
+    assert agent._fact_journal == []
+
+
+def test_bad_value(agent):
+    before = agent.recommend_destinations()
+    seasons = dict(agent.destination_seasons)
+    with pytest.raises(ValueError):
+        agent.apply_delta([{'op': 'reprice', 'name': 'paris', 'cost': 'abc'}])
+    with pytest.raises(ValueError):
+        agent.apply_delta([{'op': 'add', 'name': 'oslo', 'country': 'norway', 'continent': 'europe',
+                            'type': 'city', 'cost': 900, 'seasons': 'summer'}])
+    with pytest.raises(ValueError):
+        agent.apply_delta([{'op': 'add', 'name': 'oslo', 'country': 'norway'}])
+    assert 'oslo' not in names(agent)
+    assert agent.recommend_destinations() == before
+    assert agent.destination_seasons == seasons
+
+
+def test_journal_replay(agent, fake_pyswip):
+    agent.apply_delta([{'op': 'reprice', 'name': 'paris', 'cost': 1150},
+                       {'op': 'retract', 'fact': 'visa_free(paris)'}])
+    engine = agent.prolog
+    assert ('assertz', "destination('paris', 'france', 'europe', 'city', 1150)") in engine.calls
+    assert agent._fact_journal == []
+
+
+def test_watcher_skips_bad_lines(agent, tmp_path):
+    path = tmp_path / 'deltas.jsonl'
+    path.write_text('not json\n'
+                    '{"op": "reprice", "name": "paris", "cost": "abc"}\n'
+                    '{"op": "reprice", "name": "paris", "cost": 1150}\n'
+                    '{"op": "remove", "name": "ba')
+    watcher = DeltaWatcher(agent, str(path))
+    assert watcher.poll() == 2
+    assert agent.index.row(agent.index.row_ids['paris'])['cost'] == 1150
+    assert watcher.offset == path.read_bytes().rindex(b'\n') + 1
+
+
+def test_set_activities_retracts_each_fact(tmp_path, fake_pyswip):
+    kb_path = tmp_path / 'travel_kb.pl'
+    shutil.copy(KB, kb_path)
+    with open(kb_path, 'a') as f:
+        f.write("\nactivities(paris, [dining, river_cruises]).\n")
+    agent = SimpleTravelAgent(kb_path=str(kb_path), fast_path=True)
+    engine = agent.prolog
+    assert agent.apply_delta([{'op': 'set_activities', 'name': 'paris', 'activities': ['museums']}]) == 3
+    retracts = [fact for operation, fact in engine.calls if operation == 'retract']
+    assert len(retracts) == 2
+    assert retracts[1] == "activities('paris', ['dining', 'river_cruises'])"
+    assert engine.calls[-1] == ('assertz', "activities('paris', ['museums'])")
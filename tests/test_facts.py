@@ -0,0 +1,72 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from travel_agent_tkinter import SimpleTravelAgent
+from travel_facts import load_facts, parse_facts
+from travel_shard import partition_kb
+from travel_snapshot import compile_snapshot, load_snapshot
+
+KB = Path(__file__).resolve().parent.parent / 'travel_kb.pl'
+
+# paris gets a second activities/2 fact, kept apart from the first as in Prolog
+EXTRA = "\nactivities(paris, [dining, river_cruises]).\n"
+
+
+@pytest.fixture
+def kb_path(tmp_path):
+    path = tmp_path / 'travel_kb.pl'
+    shutil.copy(KB, path)
+    with open(path, 'a') as f:
+        f.write(EXTRA)
+    return str(path)
+
+
+def test_parse_keeps_each_activities_fact(kb_path):
+    facts = load_facts(kb_path)
+    first, second = facts.activity_facts['paris']
+    assert second == ['dining', 'river_cruises']
+    assert facts.activities['paris'] == first + second
+    assert facts.contains('activities', ['paris', ['dining', 'river_cruises']])
+    assert not facts.contains('activities', ['paris', facts.activities['paris']])
+    assert facts.remove('activities', ['paris', first])
+    assert facts.activities['paris'] == ['dining', 'river_cruises']
+    assert facts.remove('activities', ['paris', second])
+    assert 'paris' not in facts.activities and 'paris' not in facts.activity_facts
+
+
+def test_parse_simple_and_general_paths_agree():
+    text = "activities(a, [x, y]).\nactivities(a, [z]).\n/* comment */ activities(b, ['q r']).\n"
+    facts = parse_facts(text)
+    assert facts.activity_facts == {'a': [['x', 'y'], ['z']], 'b': [['q r']]}
+    assert facts.activities == {'a': ['x', 'y', 'z'], 'b': ['q r']}
+
+
+def test_snapshot_keeps_each_activities_fact(kb_path):
+    facts = load_snapshot(compile_snapshot(kb_path), kb_path)
+    assert facts.activity_facts == load_facts(kb_path).activity_facts
+    assert facts.activities == load_facts(kb_path).activities
+
+
+def test_shards_keep_each_activities_fact(kb_path, tmp_path):
+    partition_kb(kb_path, str(tmp_path / 'shards'), 2, by='hash')
+    shard_facts = [load_facts(str(path)) for path in sorted((tmp_path / 'shards').glob('*.pl'))]
+    merged = {name: lists for facts in shard_facts for name, lists in facts.activity_facts.items()}
+    assert merged == load_facts(kb_path).activity_facts
+
+
+def test_activity_deltas_with_two_facts(kb_path):
+    agent = SimpleTravelAgent(kb_path=kb_path, fast_path=True)
+    first = agent.facts.activity_facts['paris'][0]
+    assert 'paris' in agent.destinations_with_activity('river_cruises')
+    # Retracting the first fact keeps 'dining', which the second still offers
+    agent.apply_delta([{'op': 'retract', 'fact': f"activities(paris, [{', '.join(first)}])"}])
+    assert 'paris' in agent.destinations_with_activity('dining')
+    assert all('paris' not in agent.destinations_with_activity(activity)
+               for activity in first if activity != 'dining')
+    # set_activities retracts every remaining fact before asserting the new one
+    agent.apply_delta([{'op': 'set_activities', 'name': 'paris', 'activities': ['museums']}])
+    assert agent.facts.activity_facts['paris'] == [['museums']]
+    assert 'paris' not in agent.destinations_with_activity('river_cruises')
+    assert 'paris' not in agent.destinations_with_activity('dining')
@@ -0,0 +1,218 @@
+import random
+from pathlib import Path
+
+import pytest
+
+from travel_agent_tkinter import SimpleTravelAgent
+from travel_index import ActivityIndex, DestinationIndex, SimilarityIndex
+
+CONTINENTS = ['europe', 'asia', 'africa', 'oceania']
+TYPES = ['city', 'beach', 'historical', 'adventure']
+
+ACTIVITIES = ['hiking', 'museums', 'beaches', 'dining', 'diving', 'shopping', 'skiing', 'safari']
+
+KB = Path(__file__).resolve().parent.parent / 'travel_kb.pl'
+
+
+def random_destinations(rng, size):
+    return [{'name': f"d{i}", 'country': f"c{i % 7}", 'continent': rng.choice(CONTINENTS),
+             'type': rng.choice(TYPES), 'cost': rng.randrange(200, 3000, 50)} for i in range(size)]
+
+
+def scan(destinations, continent=None, dest_type=None, max_budget=None, min_budget=None):
+    """Linear scan with the semantics of the destination/5 goals the index replaces"""
+    return [dest for dest in destinations
+            if (continent is None or dest['continent'] == continent)
+            and (dest_type is None or dest['type'] == dest_type)
+            and (max_budget is None or dest['cost'] <= max_budget)
+            and (min_budget is None or dest['cost'] >= min_budget)]
+
+
+def criteria(rng):
+    return {'continent': rng.choice([None] + CONTINENTS + ['antarctica']),
+            'dest_type': rng.choice([None] + TYPES),
+            'max_budget': rng.choice([None, rng.randrange(100, 3200, 50)]),
+            'min_budget': rng.choice([None, None, rng.randrange(100, 3200, 50)])}
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_destination_index_matches_scan(seed):
+    rng = random.Random(seed)
+    destinations = random_destinations(rng, rng.choice([0, 1, 50, 2000]))
+    index = DestinationIndex(destinations)
+    assert len(index) == len(destinations)
+    for _ in range(100):
+        query = criteria(rng)
+        assert index.rows(index.query(**query)) == scan(destinations, **query)
+
+
+def test_destination_index_add_remove():
+    rng = random.Random(42)
+    destinations = random_destinations(rng, 500)
+    index = DestinationIndex(destinations)
+    live = list(destinations)
+    removed = 0
+    for i in range(300):
+        if rng.random() < 0.5:
+            dest = random_destinations(rng, 1)[0]
+            dest['name'] = f"new{i}"
+            index.add(dest)
+            live.append(dest)
+        else:
+            dest = live.pop(rng.randrange(len(live)))
+            assert index.remove(index.row_ids[dest['name']])
+            removed += 1
+    assert len(index) == len(live)
+    assert index.removed == removed
+    for _ in range(100):
+        query = criteria(rng)
+        assert index.rows(index.query(**query)) == scan(live, **query)
+    # Sorted by cost, ties in KB order
+    assert [index.costs[row] for row in index.cost_order] == sorted(dest['cost'] for dest in live)
+
+
+def test_destination_index_remove_twice():
+    index = DestinationIndex(random_destinations(random.Random(1), 10))
+    assert index.remove(3)
+    assert not index.remove(3)
+    assert 'd3' not in index.row_ids
+    assert 3 not in index.query()
+
+
+def test_agent_recommendations_match_scan():
+    agent = SimpleTravelAgent(kb_path=str(KB), fast_path=True)
+    destinations = agent.facts.destinations
+    for continent in ['Any', 'europe', 'asia']:
+        for dest_type in ['Any', 'city', 'beach']:
+            for max_budget in [None, 700, 1500]:
+                expected = scan(destinations, None if continent == 'Any' else continent,
+                                None if dest_type == 'Any' else dest_type, max_budget)
+                assert agent.recommend_destinations(continent, dest_type, max_budget) == expected
+    assert agent.destinations_within_budget(700) == [dest['name'] for dest in scan(destinations, max_budget=700)]
+    for continent in ['europe', 'asia', 'antarctica']:
+        costs = [dest['cost'] for dest in scan(destinations, continent)]
+        expected = [(dest['name'], dest['cost']) for dest in scan(destinations, continent)
+                    if dest['cost'] == min(costs)]
+        assert agent.cheapest_in_continent(continent) == expected
+
+
+def random_activities(rng, destinations, rare=()):
+    activities = {}
+    for dest in destinations:
+        offered = rng.sample(ACTIVITIES, rng.randint(0, 5))
+        if rng.random() < 0.01:
+            offered += list(rare)
+        if offered:
+            activities[dest['name']] = offered
+    return activities
+
+
+def activity_scan(destinations, activities, wanted, match_all=True):
+    """Row ids the member/2 scan behind destination_with_activity/2 finds"""
+    test = all if match_all else any
+    return [row for row, dest in enumerate(destinations)
+            if wanted and test(activity in activities.get(dest['name'], ()) for activity in wanted)]
+
+
+@pytest.mark.parametrize('size', [10, 300, 5000])
+def test_activity_index_matches_scan(size):
+    rng = random.Random(size)
+    destinations = random_destinations(rng, size)
+    activities = random_activities(rng, destinations, rare=['ballooning'])
+    index = ActivityIndex(DestinationIndex(destinations), activities)
+    if size == 5000:
+        # Common activities take the bitmap path
+        assert index.bitmaps and len(index.postings['hiking']) > index.PROBE_LIMIT
+    wanted_sets = [[], ['hiking'], ['ballooning'], ['unknown'], ['hiking', 'dining'],
+                   ['hiking', 'dining', 'diving'], ['ballooning', 'hiking'], ['hiking', 'hiking']]
+    for wanted in wanted_sets:
+        for match_all in (True, False):
+            assert list(index.query(wanted, match_all)) == activity_scan(destinations, activities, wanted, match_all)
+    assert index.activities() == sorted({a for offered in activities.values() for a in offered})
+
+
+def test_activity_index_add_remove():
+    rng = random.Random(9)
+    destinations = random_destinations(rng, 3000)
+    activities = random_activities(rng, destinations)
+    index = ActivityIndex(DestinationIndex(destinations), activities)
+    for _ in range(500):
+        row = rng.randrange(len(destinations))
+        name = destinations[row]['name']
+        if name in activities and rng.random() < 0.5:
+            index.remove(row, activities.pop(name))
+        else:
+            offered = rng.sample(ACTIVITIES, rng.randint(1, 3))
+            index.add(row, offered)
+            activities.setdefault(name, []).extend(offered)
+    for wanted in (['hiking'], ['hiking', 'dining'], ['safari', 'skiing', 'museums']):
+        for match_all in (True, False):
+            assert list(index.query(wanted, match_all)) == activity_scan(destinations, activities, wanted, match_all)
+
+
+def test_agent_activity_search():
+    agent = SimpleTravelAgent(kb_path=str(KB), fast_path=True)
+    activities = agent.facts.activities
+    for activity in agent.get_all_activities()[:5]:
+        assert agent.destinations_with_activity(activity) == [
+            name for name, offered in activities.items() if activity in offered]
+    wanted = agent.get_all_activities()[:3]
+    for match_all in (True, False):
+        test = all if match_all else any
+        assert [dest['name'] for dest in agent.search_by_activities(wanted, match_all)] == [
+            dest['name'] for dest in agent.facts.destinations
+            if test(activity in activities.get(dest['name'], ()) for activity in wanted)]
+
+
+def similar_scan(index, row, max_price_difference):
+    """Rows similar_destinations/3 finds: same type, another name, cost within the difference"""
+    dest = index.row(row)
+    return [other for other in index.live_rows
+            if index.row(other)['type'] == dest['type'] and index.names[other] != dest['name']
+            and abs(index.costs[other] - dest['cost']) <= max_price_difference]
+
+
+def check_similarity(index, similarity, rng):
+    for row in rng.sample(list(index.live_rows), min(50, len(index))):
+        for difference in (0, 100, 400):
+            assert similarity.similar(row, difference) == similar_scan(index, row, difference)
+        for k, difference in ((3, None), (5, 300), (50, 100)):
+            found = similarity.top_k(row, k, difference)
+            candidates = similar_scan(index, row, float('inf') if difference is None else difference)
+            gaps = sorted(abs(index.costs[other] - index.costs[row]) for other in candidates)
+            # Closest first; which of several equally close rows is picked is unspecified
+            assert [abs(index.costs[other] - index.costs[row]) for other in found] == gaps[:k]
+            assert set(found) <= set(candidates)
+
+
+def test_similarity_index_matches_scan():
+    rng = random.Random(5)
+    index = DestinationIndex(random_destinations(rng, 800))
+    check_similarity(index, SimilarityIndex(index), rng)
+
+
+def test_similarity_index_add_remove():
+    rng = random.Random(6)
+    index = DestinationIndex(random_destinations(rng, 400))
+    similarity = SimilarityIndex(index)
+    for i in range(200):
+        if rng.random() < 0.5:
+            dest = random_destinations(rng, 1)[0]
+            dest['name'] = f"new{i}"
+            similarity.add(index.add(dest))
+        else:
+            row = rng.choice(list(index.live_rows))
+            similarity.remove(row)
+            index.remove(row)
+    check_similarity(index, similarity, rng)
+
+
+def test_agent_similar_destinations():
+    agent = SimpleTravelAgent(kb_path=str(KB), fast_path=True)
+    destinations = agent.facts.destinations
+    for dest in destinations:
+        assert agent.similar_destinations(dest['name'], 200) == [
+            other['name'] for other in destinations
+            if other['type'] == dest['type'] and other['name'] != dest['name']
+            and abs(other['cost'] - dest['cost']) <= 200]
+    assert agent.similar_destinations('atlantis', 200) == []
@@ -0,0 +1,131 @@
+import random
+from itertools import combinations
+
+import pytest
+
+import travel_planner
+from travel_planner import TripPlanner, window_months
+from travel_ranking import DEFAULT_WEIGHTS, Ranker
+
+SEASONS = ['Winter (December-February)', 'Spring (March-May)', 'Summer (June-August)',
+           'Autumn (September-November)', 'Dry Season (November-April)']
+ACTIVITIES = ['hiking', 'museums', 'beaches', 'dining', 'diving']
+
+
+def random_kb(rng, size):
+    destinations = []
+    seasons = {}
+    activities = {}
+    for i in range(size):
+        name = f"d{i}"
+        destinations.append({'name': name, 'country': 'c', 'continent': 'europe', 'type': 'city',
+                             'cost': rng.randrange(100, 2000, 50)})
+        labels = rng.sample(SEASONS, 3)
+        seasons[name] = {'best_season': labels[0], 'alternative_seasons': labels[1:rng.randint(1, 3)]}
+        activities[name] = rng.sample(ACTIVITIES, rng.randint(0, 3))
+    return destinations, seasons, activities
+
+
+def planner(kb, stops, **options):
+    destinations, seasons, activities = kb
+    ranker = Ranker(lambda dest: seasons[dest['name']], activities)
+    return TripPlanner(destinations, lambda dest: seasons[dest['name']], activities, ranker, stops, **options)
+
+
+def brute_force(kb, stops, people=1, budget=None, window=None, required_activities=(), k=3):
+    """Scores of the k best plans by trying every combination"""
+    destinations, seasons, activities = kb
+    ranker = Ranker(lambda dest: seasons[dest['name']], activities)
+    checker = planner(kb, 1, people=people, window=window)
+    scored = []
+    for dest in destinations:
+        season_score, month, _ = checker.season_fit(dest)
+        if window is not None and month is None:
+            continue
+        scored.append((dest, ranker.score(dest) + DEFAULT_WEIGHTS['season'] * season_score))
+    scores = []
+    for plan in combinations(scored, stops):
+        if budget and sum(dest['cost'] * people for dest, _ in plan) > budget:
+            continue
+        offered = {activity for dest, _ in plan for activity in activities[dest['name']]}
+        if not set(required_activities) <= offered:
+            continue
+        scores.append(round(sum(score for _, score in plan), 4))
+    return sorted(scores, reverse=True)[:k]
+
+
+def test_window_months():
+    assert window_months(None) == []
+    assert window_months('june') == [6]
+    assert window_months(('november', 'february')) == [11, 12, 1, 2]
+    assert window_months(['may', 7]) == [5, 7]
+    with pytest.raises(ValueError):
+        window_months(('smarch', 'june'))
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_matches_brute_force(seed):
+    rng = random.Random(seed)
+    kb = random_kb(rng, rng.randint(4, 12))
+    options = {
+        'stops': rng.randint(1, 3),
+        'people': rng.randint(1, 3),
+        'budget': rng.choice([None, rng.randrange(1000, 8000, 250)]),
+        'window': rng.choice([None, 'july', ('november', 'january'), ('march', 'april')]),
+        'required_activities': rng.sample(ACTIVITIES, rng.randint(0, 2)),
+        'k': rng.randint(1, 4),
+    }
+    plans = planner(kb, time_budget=None, **options).best_plans()
+    assert [plan['score'] for plan in plans] == brute_force(kb, **options)
+
+
+def test_plans_are_feasible():
+    kb = random_kb(random.Random(4), 12)
+    _, seasons, activities = kb
+    plans = planner(kb, 2, people=2, budget=5000, window=('june', 'august'),
+                    required_activities=['hiking', 'dining'], k=5, time_budget=None).best_plans()
+    assert plans
+    for plan in plans:
+        assert len(plan['stops']) == 2
+        assert plan['total_cost'] == sum(stop['total_cost'] for stop in plan['stops']) <= 5000
+        assert {'hiking', 'dining'} <= set(plan['activities'])
+        for stop in plan['stops']:
+            assert stop['total_cost'] == stop['cost'] * 2
+            assert stop['month'] in (6, 7, 8)
+            record = seasons[stop['name']]
+            assert stop['season'] in [record['best_season']] + record['alternative_seasons']
+    assert [plan['score'] for plan in plans] == sorted((plan['score'] for plan in plans), reverse=True)
+
+
+def test_no_feasible_plan():
+    kb = random_kb(random.Random(3), 8)
+    assert planner(kb, 2, budget=150, time_budget=None).best_plans() == []
+    assert planner(kb, 9, time_budget=None).best_plans() == []
+
+
+def test_time_budget_cutoff(monkeypatch):
+    # Check the clock on every step so the cutoff does not depend on machine speed
+    monkeypatch.setattr(travel_planner, 'CLOCK_INTERVAL', 1)
+    kb = random_kb(random.Random(11), 300)
+    trip = planner(kb, 3, k=5, time_budget=1e-9)
+    assert trip.best_plans() == []
+    assert trip.stats['timed_out']
+
+    trip = planner(kb, 3, k=5, time_budget=None)
+    assert len(trip.best_plans()) == 5
+    assert not trip.stats['timed_out']
+
+
+def test_iter_plans_improves():
+    kb = random_kb(random.Random(5), 12)
+    trip = planner(kb, 2, k=1, time_budget=None)
+    scores = [plan['score'] for plan in trip.iter_plans()]
+    assert scores == sorted(scores)
+    assert scores[-1] == brute_force(kb, 2, k=1)[0]
+
+
+@pytest.mark.parametrize('options', [{'stops': 0}, {'stops': 2, 'k': 0}, {'stops': 2, 'people': 0}])
+def test_validation(options):
+    kb = random_kb(random.Random(1), 5)
+    with pytest.raises(ValueError):
+        planner(kb, **options)
@@ -0,0 +1,93 @@
+import random
+from itertools import islice
+from pathlib import Path
+
+import pytest
+
+from travel_agent_tkinter import SimpleTravelAgent
+from travel_ranking import ALTERNATIVE_SEASON_SCORE, Ranker, month_number, season_months, value_rating
+
+KB = Path(__file__).resolve().parent.parent / 'travel_kb.pl'
+
+
+@pytest.fixture(scope='module')
+def agent():
+    return SimpleTravelAgent(kb_path=str(KB), fast_path=True)
+
+
+def many(agent, size, seed=0):
+    """Repeat the KB's destinations with random costs, so many keys tie"""
+    rng = random.Random(seed)
+    base = agent.recommend_destinations()
+    return [dict(rng.choice(base), cost=rng.randrange(200, 3000, 100)) for _ in range(size)]
+
+
+@pytest.mark.parametrize('sort_by', ['relevance', 'price_low', 'price_high', 'value', 'season'])
+@pytest.mark.parametrize('first', [1, 7, 500])
+def test_iter_ranked_is_a_stable_sort(agent, sort_by, first):
+    destinations = many(agent, 300)
+    ranking = {'sort_by': sort_by, 'month': 'july', 'max_budget': 1500, 'activities': ['dining']}
+    ranker = agent.ranker(**ranking)
+    expected = sorted(destinations, key=ranker.key, reverse=True)
+    assert list(ranker.iter_ranked(destinations, first)) == expected
+    assert list(islice(agent.iter_ranked(iter(destinations), **ranking), 20)) == expected[:20]
+    assert ranker.top_k(destinations, 20) == expected[:20]
+
+
+def test_iter_ranked_empty(agent):
+    assert list(agent.ranker().iter_ranked([])) == []
+
+
+SEASONS = {
+    'a': {'best_season': 'Summer (June-August)', 'alternative_seasons': ('Spring (March-May)',)},
+    'b': {'best_season': 'Dry Season (November-April)', 'alternative_seasons': ()},
+}
+ACTIVITIES = {'a': ['hiking', 'dining'], 'b': ['diving']}
+
+
+def ranker(**options):
+    return Ranker(lambda dest: SEASONS[dest['name']], ACTIVITIES, **options)
+
+
+def test_months():
+    assert month_number('Jul') == 7
+    assert month_number('12') == 12
+    assert month_number(13) is None
+    assert month_number('ju') is None
+    assert season_months('Dry Season (November-April)') == {11, 12, 1, 2, 3, 4}
+    assert season_months('Monsoon (July)') == {7}
+    assert season_months('All year') == frozenset()
+
+
+def test_value_rating():
+    assert [value_rating(cost) for cost in (100, 400, 800, 1200, 5000)] == [5, 5, 4, 3, 1]
+
+
+def test_scores():
+    a = {'name': 'a', 'cost': 850}
+    b = {'name': 'b', 'cost': 2000}
+    assert ranker().cost_fit(0) == 1.0
+    assert ranker().cost_fit(2000) == 0.0
+    assert ranker(max_budget=1000).cost_fit(850) == 1.0
+    assert ranker(max_budget=1000).cost_fit(850) > ranker(max_budget=1000).cost_fit(400)
+    assert ranker(month='july').season_match(a) == 1.0
+    assert ranker(month='april').season_match(a) == ALTERNATIVE_SEASON_SCORE
+    assert ranker(month='april').season_match(b) == 1.0
+    assert ranker(month='september').season_match(b) == 0.0
+    assert ranker().season_match(a) == 0.0
+    assert ranker(wanted_activities=['hiking', 'diving']).activity_overlap(a) == 0.5
+    # Each criterion adds its weighted score
+    base = ranker().score(a)
+    assert ranker(month='july').score(a) == pytest.approx(base + 1.0)
+    assert ranker(month='july', weights={'season': 2.0}).score(a) == pytest.approx(base + 2.0)
+    assert ranker(wanted_activities=['hiking']).score(a) == pytest.approx(base + 1.0)
+    assert ranker().score(a) > ranker().score(b)
+
+
+def test_sort_orders():
+    destinations = [{'name': 'a', 'cost': 850}, {'name': 'b', 'cost': 300}, {'name': 'a', 'cost': 1900}]
+    assert [d['cost'] for d in ranker(sort_by='price_low').top_k(destinations, 3)] == [300, 850, 1900]
+    assert [d['cost'] for d in ranker(sort_by='price_high').top_k(destinations, 3)] == [1900, 850, 300]
+    assert [d['cost'] for d in ranker(sort_by='season', month='july').top_k(destinations, 3)] == [850, 1900, 300]
+    with pytest.raises(ValueError):
+        ranker(sort_by='alphabetical')
@@ -0,0 +1,53 @@
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import travel_server
+import travel_workers
+
+KB = Path(__file__).resolve().parent.parent / 'travel_kb.pl'
+
+
+def test_search_count_is_total(monkeypatch):
+    monkeypatch.setattr(travel_workers, '_agent', None)
+    travel_workers.init_worker(str(KB), fast_path=True)
+    status, everything = travel_server.handle_request('search', None, {})
+    status, limited = travel_server.handle_request('search', None, {'limit': '2'})
+    assert status == 200
+    assert len(limited['results']) == 2
+    assert limited['count'] == everything['count'] == len(everything['results']) > 2
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """Answers /search, drops every other connection without a response"""
+
+    def do_GET(self):
+        if self.path == '/search':
+            body = json.dumps({'count': 1, 'results': [{'name': 'paris'}]}).encode()
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+def test_load_counts_dropped_connections(capsys):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FlakyHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        args = argparse.Namespace(url=f"http://127.0.0.1:{server.server_address[1]}", requests=20,
+                                  concurrency=4, timeout=5.0)
+        travel_server.load_test(args)
+    finally:
+        server.shutdown()
+        server.server_close()
+    report = json.loads(capsys.readouterr().out)
+    assert report['requests'] == 20
+    assert report['errors'] == 20
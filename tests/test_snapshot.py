@@ -0,0 +1,45 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from travel_agent_tkinter import SimpleTravelAgent
+from travel_facts import load_facts
+from travel_snapshot import compile_snapshot, load_snapshot
+
+KB = Path(__file__).resolve().parent.parent / 'travel_kb.pl'
+
+
+@pytest.fixture
+def kb_path(tmp_path):
+    path = tmp_path / 'travel_kb.pl'
+    shutil.copy(KB, path)
+    return str(path)
+
+
+def test_round_trip(kb_path):
+    snapshot = load_snapshot(compile_snapshot(kb_path), kb_path)
+    facts = load_facts(kb_path)
+    assert snapshot.destinations == facts.destinations
+    assert snapshot.best_seasons == facts.best_seasons
+    assert snapshot.activities == facts.activities
+    assert snapshot.budget_levels == facts.budget_levels
+    assert snapshot.other_clauses == facts.other_clauses
+
+
+def test_stale_snapshot(kb_path):
+    path = compile_snapshot(kb_path)
+    with open(kb_path, 'a') as f:
+        f.write("\ndestination(oslo, norway, europe, city, 900).\n")
+    with pytest.raises(ValueError, match="stale"):
+        load_snapshot(path, kb_path)
+    # The agent falls back to the text
+    agent = SimpleTravelAgent(kb_path=kb_path, fast_path=True)
+    assert 'oslo' in agent.index.row_ids
+
+
+def test_not_a_snapshot(tmp_path):
+    path = tmp_path / 'bad.kbs'
+    path.write_bytes(b'not a snapshot' * 20)
+    with pytest.raises(ValueError, match="not a knowledge base snapshot"):
+        load_snapshot(str(path))
@@ -1,128 +1,866 @@
-import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
-from pyswip import Prolog
+import time
+# Reference point for the GUI startup timing report
+STARTUP_STARTED = time.perf_counter()
+try:
+    import tkinter as tk
+    from tkinter import ttk, messagebox, scrolledtext, filedialog
+except ImportError:
+    # Headless installs (travel_server.py) run without Tk
+    tk = None
+import json
+import os
+import queue
 import random
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from itertools import islice
+from travel_facts import KnowledgeFacts, check_fact, load_facts, parse_fact
+from travel_analytics import CostAnalytics
+from travel_delta import DeltaWatcher
+from travel_index import ActivityIndex, DestinationIndex, SimilarityIndex
+from travel_planner import TripPlanner
+from travel_ranking import MONTHS, Ranker, value_rating
+from travel_snapshot import load_snapshot, snapshot_path_for
+from travel_seasons import compile_destination_seasons, season_entry
+from travel_trace import format_search, tracer
+
+IMPORTS_DONE = time.perf_counter()
+
+# Number of result cards inserted into the results widget at a time
+RESULTS_PAGE_SIZE = 200
+
+# Searches listed in the F12 debug panel
+DEBUG_PANEL_SEARCHES = 10
+
+# "Similar destinations" shown on each result card
+SIMILAR_PER_CARD = 3
+SIMILAR_MAX_PRICE_DIFFERENCE = 300
+
+# Search panel sort orders and the travel_ranking sort_by they map to
+SORT_CHOICES = {
+    "Best match": 'relevance',
+    "Price: low to high": 'price_low',
+    "Price: high to low": 'price_high',
+    "Value rating": 'value',
+    "Season fit": 'season',
+    "Knowledge base order": None
+}
+
+TYPE_EMOJIS = {
+    'beach': '🏖️', 'mountain': '⛰️', 'city': '🏙️',
+    'historical': '🏛️', 'adventure': '🎯'
+}
+
+def render_destination_card(dest, season_info, similar=None):
+    """Render one destination as a card-like text entry"""
+    # Destination header with emoji based on type
+    emoji = TYPE_EMOJIS.get(dest['type'], '📍')
+    
+    card = f"{emoji} {dest['name'].title()}, {dest['country'].title()}\n"
+    card += f"   🌐 {dest['continent'].replace('_', ' ').title()}"
+    card += f" • 🎯 {dest['type'].title()}"
+    card += f" • 💰 ${dest['cost']} per person\n"
+    
+    # Add rating stars based on cost (inverse relationship for demo)
+    rating = value_rating(dest['cost'])
+    card += f"   ⭐ {'★' * rating}{'☆' * (5 - rating)} Value Rating\n"
+    
+    card += f"\n   🌤️Best Time to Visit: {season_info['best_season']}\n"
+    card += f"   💡 Why: {season_info['reason']}\n"
+    
+    if season_info['alternative_seasons']:
+        card += f"   🌈 Also Good: {', '.join(season_info['alternative_seasons'])}\n"
+    
+    if similar:
+        card += f"   🔁 Similar: {', '.join(name.replace('_', ' ').title() for name in similar)}\n"
+    
+    card += "\n" + "-"*50 + "\n\n"
+    return card
+
+def prolog_atom(value):
+    """Quote a Python string as a Prolog atom"""
+    return "'" + str(value).replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+def prolog_term(value):
+    """Format a parsed fact argument (atom, number, list or compound) as Prolog text"""
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, list):
+        return "[" + ", ".join(prolog_term(item) for item in value) + "]"
+    if isinstance(value, tuple):
+        return prolog_atom(value[0]) + "(" + ", ".join(prolog_term(arg) for arg in value[1:]) + ")"
+    return prolog_atom(value)
+
+def destination_goal(continent=None, dest_type=None, max_budget=None, min_budget=None,
+                     offset=0, limit=None):
+    """destination/5 goal with the search constraints inside it
+    
+    Continent and type are bound in the call, the budget becomes a
+    comparison, and offset/limit (library(solution_sequences)) make the
+    engine stop after the last solution wanted.
+    """
+    goal = "destination(Name, Country, %s, %s, Cost)" % (
+        prolog_atom(continent) if continent else "Continent",
+        prolog_atom(dest_type) if dest_type else "Type"
+    )
+    if min_budget is not None:
+        goal += f", Cost >= {prolog_term(min_budget)}"
+    if max_budget is not None:
+        goal += f", Cost =< {prolog_term(max_budget)}"
+    if offset:
+        goal = f"offset({int(offset)}, ({goal}))"
+    if limit is not None:
+        goal = f"limit({int(limit)}, ({goal}))"
+    return goal
+
+def iter_result_cards(travel_agent, destinations):
+    """Lazily yield one card per destination, looking up a page at a time
+    
+    destinations may be any iterable, e.g. a lazily ranked result set.
+    Cards come from the agent's card cache and only misses are rendered.
+    """
+    destinations = iter(destinations)
+    while True:
+        page = list(islice(destinations, RESULTS_PAGE_SIZE))
+        if not page:
+            return
+        yield from travel_agent.render_cards(page)
 
 class SimpleTravelAgent:
-    def __init__(self):
-        self.prolog = Prolog()
-        self.prolog.consult("travel_kb.pl")
+    def __init__(self, kb_path="travel_kb.pl", cache_size=256, cache_ttl=300.0, fast_path=False,
+                 snapshot_path=None):
+        self.kb_path = kb_path
+        # With fast_path the ground facts are read in Python (from a fresh
+        # binary snapshot when one exists) and SWI-Prolog only starts when a
+        # query needs a rule without a Python equivalent
+        self.fast_path = fast_path
+        self.snapshot_path = snapshot_path or snapshot_path_for(kb_path)
+        # pyswip engines are not reentrant; searches may run on worker threads
+        self._lock = threading.RLock()
+        # Held while reading or updating the Python-side indexes in place
+        self._index_lock = threading.RLock()
+        
+        # LRU cache of recommend_destinations results, invalidated by kb_version
+        self.kb_version = 0
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_evictions = 0
+        self.cache_expirations = 0
+        
+        # NumPy views of the index for aggregates, rebuilt lazily per kb_version
+        self._analytics = None
+        self._analytics_version = None
+        
+        # Rendered result cards by destination name, valid for one kb_version;
+        # render_all_cards fills it ahead of the searches
+        self._cards = {}
+        self._cards_version = None
+        
+        # Runtime assert/retract calls, replayed into an engine started later
+        self._fact_journal = []
+        self._prolog = None
+        if not fast_path:
+            self._start_engine()
+        self._kb_stamp = self._read_kb_stamp()
+        self.facts = self._load_facts()
+        self._build_indexes()
     
-    def get_all_destinations(self):
-        """Get all destinations from knowledge base"""
-        destinations = []
+    @property
+    def prolog(self):
+        """The consulted Prolog engine, started on first use"""
+        if self._prolog is None:
+            return self._start_engine()
+        return self._prolog
+    
+    def _start_engine(self):
+        with self._lock:
+            if self._prolog is None:
+                with tracer.span('prolog.consult'):
+                    # Imported here so fast-path users never load SWI-Prolog
+                    from pyswip import Prolog
+                    engine = Prolog()
+                    engine.consult(self.kb_path)
+                for operation, fact in self._fact_journal:
+                    try:
+                        getattr(engine, operation)(fact)
+                    except StopIteration:
+                        # pyswip's retract: the consulted KB lacks the fact
+                        pass
+                # Changes go straight to the engine from now on
+                self._fact_journal = []
+                self._prolog = engine
+            return self._prolog
+    
+    @tracer.traced('agent.load_facts')
+    def _load_facts(self):
+        """Ground facts from the .pl file (fast path) or from the engine"""
+        if self.fast_path:
+            if os.path.exists(self.snapshot_path):
+                try:
+                    return load_snapshot(self.snapshot_path, self.kb_path)
+                except (OSError, ValueError) as e:
+                    print(f"Ignoring snapshot: {e}")
+            return load_facts(self.kb_path)
+        facts = KnowledgeFacts()
+        facts.destinations = list(self.iter_destinations(use_index=False))
+        with self._lock:
+            for result in self.prolog.query("best_season(Name, Season)"):
+                facts.add('best_season', [result["Name"], result["Season"]])
+            for result in self.prolog.query("activities(Name, Activities)"):
+                facts.add('activities', [result["Name"], [str(a) for a in result["Activities"]]])
+            for result in self.prolog.query("budget_level(Level, Min, Max)"):
+                facts.add('budget_level', [result["Level"], result["Min"], result["Max"]])
+            tracer.count('prolog.solutions', sum(len(values) for values in facts.best_seasons.values())
+                         + len(facts.activities) + len(facts.budget_levels))
+        return facts
+    
+    def query(self, goal):
+        """Run any Prolog goal, starting the engine if needed"""
+        with self._lock, tracer.span('prolog.query', goal=goal):
+            solutions = list(self.prolog.query(goal))
+        tracer.count('prolog.solutions', len(solutions))
+        return solutions
+    
+    def _read_kb_stamp(self):
+        """Modification stamp of the knowledge base file"""
         try:
-            for result in self.prolog.query("destination(Name, Country, Continent, Type, Cost)"):
-                destinations.append({
-                    'name': result["Name"],
-                    'country': result["Country"],
-                    'continent': result["Continent"],
-                    'type': result["Type"],
-                    'cost': result["Cost"]
-                })
-        except Exception as e:
-            print(f"Error loading destinations: {e}")
-        return destinations
+            stat = os.stat(self.kb_path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
     
-    def recommend_destinations(self, continent=None, dest_type=None, max_budget=None):
-        """Simple recommendation engine"""
-        destinations = self.get_all_destinations()
+    def _ensure_index(self):
+        """Reconsult and rebuild the index if travel_kb.pl changed on disk"""
+        stamp = self._read_kb_stamp()
+        if stamp == self._kb_stamp:
+            return
+        with self._lock:
+            if stamp == self._kb_stamp:
+                return
+            # The file is the new source of truth; earlier runtime changes are dropped
+            self._fact_journal = []
+            if self._prolog is not None:
+                self._prolog.consult(self.kb_path)
+            self.facts = self._load_facts()
+            self._build_indexes()
+            self._kb_stamp = stamp
+    
+    @tracer.traced('agent.build_indexes')
+    def _build_indexes(self):
+        """Build the destination index and resolve per-destination seasons"""
+        facts = self.facts
+        with self._index_lock:
+            self.destination_seasons = compile_destination_seasons(facts.destinations, facts.best_seasons)
+            self.index = DestinationIndex(facts.destinations)
+            self.activity_index = ActivityIndex(self.index, facts.activities)
+            self.similarity_index = SimilarityIndex(self.index)
+            self._bump_kb_version()
+    
+    def _bump_kb_version(self):
+        """Mark every cached query result as stale"""
+        with self._cache_lock:
+            self.kb_version += 1
+            self._cache.clear()
+    
+    def assert_fact(self, fact):
+        """Add a fact to the knowledge base, e.g. destination(oslo, norway, europe, city, 900)"""
+        functor, args = parse_fact(fact)
+        check_fact(functor, args)
+        with self._lock, self._index_lock:
+            self._apply_fact('assertz', functor, args)
+            self._finish_update()
+    
+    def retract_fact(self, fact):
+        """Remove a fact from the knowledge base"""
+        functor, args = parse_fact(fact)
+        with self._lock, self._index_lock:
+            self._apply_fact('retract', functor, args)
+            self._finish_update()
+    
+    def apply_delta(self, changes):
+        """Apply a batch of changes through assert/retract, updating the indexes in place
         
-        if continent and continent != "Any":
-            destinations = [d for d in destinations if d['continent'] == continent]
+        Each change is a dict with an 'op':
+            add                          name, country, continent, type, cost,
+                                         optional seasons and activities lists
+            remove                       name (its seasons and activities go too)
+            reprice                      name, cost
+            add_season, remove_season    name, season
+            set_activities               name, activities
+            assert, retract              fact, e.g. "budget_level(luxury, 2001, 5000)"
         
-        if dest_type and dest_type != "Any":
-            destinations = [d for d in destinations if d['type'] == dest_type]
+        Each change is checked in full before any of its facts are applied,
+        so a bad one (missing keys, a cost that is not a number, seasons or
+        activities that are not atoms) raises ValueError and leaves the KB
+        untouched. If the engine fails part way through a change, the facts
+        already applied for it are undone. Changes apply in order and the
+        batch stops at a bad one. Returns the number of facts that changed.
+        """
+        changed = 0
+        with self._lock, self._index_lock:
+            try:
+                for change in changes:
+                    changed += self._apply_change(self._delta_facts(change))
+            finally:
+                self._finish_update()
+        return changed
+    
+    def _apply_change(self, operations):
+        """Apply one change's fact operations, undoing them all if one fails"""
+        done = []
+        try:
+            for operation, functor, args in operations:
+                if self._apply_fact(operation, functor, args):
+                    done.append((operation, functor, args))
+        except Exception:
+            for operation, functor, args in reversed(done):
+                undo = 'retract' if operation == 'assertz' else 'assertz'
+                try:
+                    self._apply_fact(undo, functor, args)
+                except Exception:
+                    # The engine refused the undo too; still restore the Python side
+                    if self.facts.keeps(functor, args):
+                        self._record_fact(undo, functor, args)
+            raise
+        return len(done)
+    
+    def watch_deltas(self, path, interval=1.0):
+        """Apply delta files from path as they appear; returns the started DeltaWatcher"""
+        return DeltaWatcher(self, path, interval).start()
+    
+    def _delta_facts(self, change):
+        """Translate one delta into checked (operation, functor, args) fact changes"""
+        if not isinstance(change, dict):
+            raise ValueError(f"Delta must be an object: {change!r}")
+        try:
+            operations = self._delta_operations(change)
+        except KeyError as e:
+            raise ValueError(f"Delta is missing {e}: {change}") from None
+        for _, functor, args in operations:
+            check_fact(functor, args)
+        return operations
+    
+    def _delta_operations(self, change):
+        op = change.get('op')
+        if op in ('assert', 'retract'):
+            if not isinstance(change['fact'], str):
+                raise ValueError(f"Delta fact must be a string: {change}")
+            functor, args = parse_fact(change['fact'])
+            return [('assertz' if op == 'assert' else 'retract', functor, args)]
         
-        if max_budget:
-            destinations = [d for d in destinations if d['cost'] <= max_budget]
+        name = change.get('name')
+        if not name:
+            raise ValueError(f"Delta needs a destination name: {change}")
+        if op == 'add':
+            operations = [('assertz', 'destination', [name, change['country'], change['continent'],
+                                                      change['type'], change['cost']])]
+            seasons = change.get('seasons', [])
+            if not isinstance(seasons, list):
+                raise ValueError(f"Delta seasons must be a list: {change}")
+            operations += [('assertz', 'best_season', [name, season]) for season in seasons]
+            if change.get('activities'):
+                operations.append(('assertz', 'activities', [name, change['activities']]))
+            return operations
+        if op in ('add_season', 'remove_season'):
+            return [('assertz' if op == 'add_season' else 'retract', 'best_season', [name, change['season']])]
+        if op == 'set_activities':
+            operations = self._retract_activities(name)
+            operations.append(('assertz', 'activities', [name, change['activities']]))
+            return operations
         
-        return destinations
+        row = self.index.row_ids.get(name)
+        if row is None:
+            raise ValueError(f"Unknown destination: {name}")
+        dest = self.index.row(row)
+        old = ('retract', 'destination', [name, dest['country'], dest['continent'], dest['type'], dest['cost']])
+        if op == 'reprice':
+            return [old, ('assertz', 'destination', [name, dest['country'], dest['continent'],
+                                                     dest['type'], change['cost']])]
+        if op == 'remove':
+            operations = [old]
+            operations += [('retract', 'best_season', [name, season])
+                           for season in self.facts.best_seasons.get(name, [])]
+            return operations + self._retract_activities(name)
+        raise ValueError(f"Unknown delta op: {op}")
     
-    def get_best_season(self, destination_name, destination_type, continent):
-        """Determine best season to visit based on destination characteristics"""
-        # Season logic based on destination type and continent
-        seasons = {
-            'beach': {
-                'europe': ['Summer (June-August)', 'Late Spring (May)', 'Early Autumn (September)'],
-                'asia': ['Dry Season (November-April)', 'Summer (June-August)'],
-                'north_america': ['Summer (June-August)', 'Late Spring (May)', 'Early Fall (September)'],
-                'south_america': ['Summer (December-March)', 'Dry Season (May-October)'],
-                'africa': ['Dry Season (June-October)', 'Summer (December-February)'],
-                'australia': ['Summer (December-February)', 'Spring (September-November)']
-            },
-            'mountain': {
-                'europe': ['Summer (June-September)', 'Spring (April-June)', 'Autumn (September-October)'],
-                'asia': ['Spring (March-May)', 'Autumn (September-November)'],
-                'north_america': ['Summer (June-September)', 'Fall (September-October)'],
-                'south_america': ['Dry Season (May-September)', 'Summer (December-February)'],
-                'africa': ['Dry Season (June-October)', 'Winter (December-February)'],
-                'australia': ['Summer (December-February)', 'Autumn (March-May)']
-            },
-            'city': {
-                'europe': ['Spring (April-June)', 'Autumn (September-October)', 'Summer (June-August)'],
-                'asia': ['Winter (November-February)', 'Spring (March-May)'],
-                'north_america': ['Spring (April-June)', 'Fall (September-October)'],
-                'south_america': ['Spring (September-November)', 'Autumn (March-May)'],
-                'africa': ['Dry Season (June-October)', 'Winter (December-February)'],
-                'australia': ['Spring (September-November)', 'Autumn (March-May)']
-            },
-            'historical': {
-                'europe': ['Spring (April-June)', 'Autumn (September-October)'],
-                'asia': ['Winter (November-February)', 'Spring (March-May)'],
-                'north_america': ['Spring (April-June)', 'Fall (September-October)'],
-                'south_america': ['Dry Season (May-September)', 'Spring (September-November)'],
-                'africa': ['Dry Season (June-October)', 'Winter (December-February)'],
-                'australia': ['Autumn (March-May)', 'Spring (September-November)']
-            },
-            'adventure': {
-                'europe': ['Summer (June-September)', 'Spring (April-June)'],
-                'asia': ['Dry Season (November-April)', 'Spring (March-May)'],
-                'north_america': ['Summer (June-September)', 'Spring (April-June)'],
-                'south_america': ['Dry Season (May-September)', 'Summer (December-February)'],
-                'africa': ['Dry Season (June-October)', 'Winter (December-February)'],
-                'australia': ['Spring (September-November)', 'Autumn (March-May)']
-            }
-        }
+    def _retract_activities(self, name):
+        """Retracts of each activities/2 fact for a name"""
+        return [('retract', 'activities', [name, list(offered)])
+                for offered in self.facts.activity_facts.get(name, [])]
+    
+    def _apply_fact(self, operation, functor, args):
+        """assertz/retract one checked fact in the engine (or journal), the facts and the indexes
         
-        # Get seasons for the specific type and continent
-        type_seasons = seasons.get(destination_type, {})
-        continent_seasons = type_seasons.get(continent, ['Spring (March-May)', 'Autumn (September-November)'])
+        Retracting a fact that is not there changes nothing and never reaches
+        the engine or the journal. Returns whether anything changed.
+        """
+        kept = self.facts.keeps(functor, args)
+        if operation == 'retract' and kept and not self.facts.contains(functor, args):
+            return False
+        fact = f"{functor}({', '.join(prolog_term(arg) for arg in args)})"
+        if self._prolog is None:
+            # Replayed into the engine if one is started later
+            self._fact_journal.append((operation, fact))
+        elif operation == 'retract':
+            try:
+                self._prolog.retract(fact)
+            except StopIteration:
+                # pyswip raises this when nothing matched
+                if not kept:
+                    return False
+        else:
+            self._prolog.assertz(fact)
+        if kept:
+            self._record_fact(operation, functor, args)
+        return True
+    
+    def _record_fact(self, operation, functor, args):
+        """assertz/retract one kept fact in the facts and the indexes"""
+        if operation == 'assertz':
+            self.facts.add(functor, args)
+        else:
+            self.facts.remove(functor, args)
+        self._update_indexes(operation, functor, args)
+    
+    def _update_indexes(self, operation, functor, args):
+        """Patch the indexes for one changed fact instead of rebuilding them"""
+        index = self.index
+        if functor == 'destination':
+            dest = dict(zip(('name', 'country', 'continent', 'type', 'cost'), args))
+            name = dest['name']
+            row = index.row_ids.get(name)
+            if operation == 'assertz':
+                if row is not None:
+                    # Duplicate names: let a rebuild decide which row wins
+                    self._build_indexes()
+                    return
+                row = index.add(dest)
+                self.similarity_index.add(row)
+                self.activity_index.add(row, self.facts.activities.get(name, ()))
+            else:
+                if row is None or index.row(row) != dest:
+                    self._build_indexes()
+                    return
+                self.activity_index.remove(row, self.facts.activities.get(name, ()))
+                self.similarity_index.remove(row)
+                index.remove(row)
+            self._refresh_seasons(name)
+        elif functor == 'best_season':
+            self._refresh_seasons(args[0])
+        elif functor == 'activities':
+            row = index.row_ids.get(args[0])
+            if row is None:
+                return
+            if operation == 'assertz':
+                self.activity_index.add(row, args[1])
+            else:
+                # Activities another activities/2 fact still offers stay indexed
+                still_offered = self.facts.activities.get(args[0], ())
+                self.activity_index.remove(row, set(args[1]).difference(still_offered))
+    
+    def _refresh_seasons(self, name):
+        row = self.index.row_ids.get(name)
+        if row is None:
+            self.destination_seasons.pop(name, None)
+        else:
+            self.destination_seasons.update(
+                compile_destination_seasons([self.index.row(row)], self.facts.best_seasons)
+            )
+    
+    def _finish_update(self):
+        """Invalidate cached results, compacting once tombstones outnumber live rows"""
+        if self.index.removed > max(1024, len(self.index)):
+            self._build_indexes()
+        else:
+            self._bump_kb_version()
+    
+    def cache_stats(self):
+        """Hit/miss/eviction counters for sizing the query cache"""
+        with self._cache_lock:
+            return {
+                'hits': self.cache_hits,
+                'misses': self.cache_misses,
+                'evictions': self.cache_evictions,
+                'expirations': self.cache_expirations,
+                'size': len(self._cache),
+                'max_size': self.cache_size,
+                'ttl': self.cache_ttl,
+                'kb_version': self.kb_version
+            }
+    
+    def _cache_get(self, key):
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                version, expires_at, results = entry
+                if version != self.kb_version:
+                    del self._cache[key]
+                elif expires_at is not None and expires_at <= time.monotonic():
+                    del self._cache[key]
+                    self.cache_expirations += 1
+                else:
+                    self._cache.move_to_end(key)
+                    self.cache_hits += 1
+                    return results
+            self.cache_misses += 1
+            return None
+    
+    def _cache_put(self, key, version, results):
+        if self.cache_size <= 0:
+            return
+        expires_at = None
+        if self.cache_ttl:
+            expires_at = time.monotonic() + self.cache_ttl
+        with self._cache_lock:
+            # Results computed against an older KB must not be cached
+            if version != self.kb_version:
+                return
+            self._cache[key] = (version, expires_at, results)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+                self.cache_evictions += 1
+    
+    def get_kb_seasons(self):
+        """Get best_season/2 facts as destination -> seasons in KB order"""
+        return {name: list(seasons) for name, seasons in self.facts.best_seasons.items()}
+    
+    def get_all_destinations(self):
+        """Get all destinations from knowledge base"""
+        if self.fast_path:
+            return [dict(dest) for dest in self.facts.destinations]
+        return list(self.iter_destinations())
+    
+    def iter_destinations(self, continent=None, dest_type=None, max_budget=None, min_budget=None,
+                          limit=None, offset=0, use_index=None):
+        """Stream destinations matching the constraints, in KB order
         
-        # Return the best season (first in list) and alternatives
-        best_season = continent_seasons[0] if continent_seasons else "Spring (March-May)"
-        alternative_seasons = continent_seasons[1:] if len(continent_seasons) > 1 else []
+        The constraints, offset and limit are pushed into the Prolog goal and
+        solutions are turned into dicts one at a time, so the engine stops
+        early and memory is bounded by what the caller keeps. The engine lock
+        is held while the generator is open: exhaust it, or close() it (as
+        leaving a for loop over it does) to close the Prolog query. With
+        fast_path the destination index answers instead (use_index overrides).
+        """
+        if use_index is None:
+            use_index = self.fast_path
+        if use_index:
+            self._ensure_index()
+            with self._index_lock:
+                index = self.index
+                rows = index.query(continent, dest_type, max_budget, min_budget)
+            stop = None if limit is None else offset + limit
+            for row in islice(rows, offset, stop):
+                yield index.row(row)
+            return
         
-        return {
-            'best_season': best_season,
-            'alternative_seasons': alternative_seasons,
-            'reason': self._get_season_reason(destination_type, continent, best_season)
-        }
+        goal = destination_goal(continent, dest_type, max_budget, min_budget, offset, limit)
+        with self._lock, tracer.span('prolog.destinations', goal=goal):
+            solutions = self.prolog.query(goal)
+            try:
+                for result in solutions:
+                    tracer.count('prolog.solutions')
+                    yield {
+                        'name': result["Name"],
+                        'country': result["Country"],
+                        'continent': continent or result["Continent"],
+                        'type': dest_type or result["Type"],
+                        'cost': result["Cost"]
+                    }
+            finally:
+                solutions.close()
     
-    def _get_season_reason(self, dest_type, continent, season):
-        """Generate reason why this season is best"""
-        reasons = {
-            'beach': f"Perfect weather for beach activities with warm temperatures and minimal rainfall",
-            'mountain': f"Ideal conditions for hiking and mountain activities with clear skies and comfortable temperatures",
-            'city': f"Pleasant weather for city exploration with mild temperatures and fewer crowds",
-            'historical': f"Best time for sightseeing with comfortable weather and good visibility",
-            'adventure': f"Optimal conditions for adventure activities with stable weather and accessible terrain"
-        }
+    def count_destinations(self, continent=None, dest_type=None, max_budget=None, min_budget=None,
+                           use_index=None):
+        """Number of matching destinations, counted without materializing them"""
+        if use_index is None:
+            use_index = self.fast_path
+        if use_index:
+            self._ensure_index()
+            with self._index_lock:
+                return len(self.index.query(continent, dest_type, max_budget, min_budget))
+        goal = destination_goal(continent, dest_type, max_budget, min_budget)
+        return self.query(f"aggregate_all(count, ({goal}), Count)")[0]["Count"]
+    
+    @tracer.traced('agent.recommend')
+    def recommend_destinations(self, continent=None, dest_type=None, max_budget=None,
+                               activities=None, match_all=True):
+        """Simple recommendation engine backed by the destination index
         
-        base_reason = reasons.get(dest_type, "Favorable weather conditions and optimal travel experience")
+        activities optionally restricts results to destinations offering all
+        (match_all) or any of the given activities. Results are cached; the
+        returned dicts are shared and must not be mutated.
+        """
+        self._ensure_index()
         
-        # Add continent-specific notes
-        continent_notes = {
-            'europe': " during this popular travel period",
-            'asia': " with comfortable humidity levels",
-            'north_america': " with excellent travel conditions",
-            'south_america': " during the dry season",
-            'africa': " with minimal rainfall",
-            'australia': " with perfect outdoor conditions"
-        }
+        if not continent or continent == "Any":
+            continent = None
+        if not dest_type or dest_type == "Any":
+            dest_type = None
+        max_budget = float(max_budget) if max_budget else None
+        activities = tuple(sorted(set(activities))) if activities else None
+        match_all = bool(match_all) if activities else True
+        
+        key = (continent, dest_type, max_budget, activities, match_all)
+        results = self._cache_get(key)
+        if results is None:
+            tracer.count('cache.misses')
+            with self._index_lock, tracer.span('agent.filter'):
+                version = self.kb_version
+                index = self.index
+                rows = None
+                if activities:
+                    rows = self.activity_index.query(activities, match_all)
+                results = index.rows(index.query(continent, dest_type, max_budget, rows=rows))
+            self._cache_put(key, version, results)
+        else:
+            tracer.count('cache.hits')
+        tracer.count('results', len(results))
+        return list(results)
+    
+    def search_by_activities(self, activities, match_all=True, continent=None, dest_type=None,
+                             max_budget=None):
+        """Destinations offering all (match_all) or any of the given activities"""
+        return self.recommend_destinations(continent, dest_type, max_budget, activities, match_all)
+    
+    def destinations_with_activity(self, activity):
+        """Python equivalent of destination_with_activity/2"""
+        self._ensure_index()
+        with self._index_lock:
+            index = self.index
+            return [index.names[row] for row in self.activity_index.query([activity])]
+    
+    def get_all_activities(self):
+        """Every activity mentioned in the knowledge base, sorted"""
+        self._ensure_index()
+        with self._index_lock:
+            return self.activity_index.activities()
+    
+    def get_destination_details(self, destination_name):
+        """Get one destination's details, or None if it is not in the KB"""
+        self._ensure_index()
+        with self._index_lock:
+            index = self.index
+            row = index.row_ids.get(destination_name)
+            if row is None:
+                return None
+            return dict(index.row(row))
+    
+    def calculate_total_cost(self, destination_name, number_of_people):
+        """Python equivalent of calculate_total_cost/3; None for an unknown destination"""
+        details = self.get_destination_details(destination_name)
+        if details is None:
+            return None
+        return details['cost'] * number_of_people
+    
+    def get_activities(self, destination_name):
+        """Get the activities available at a destination"""
+        return list(self.facts.activities.get(destination_name, []))
+    
+    def recommend_destination(self, continent, budget_level, dest_type=None):
+        """Python equivalent of recommend_destination/3 and /4"""
+        self._ensure_index()
+        with self._index_lock:
+            index = self.index
+            names = []
+            for level, low, high in self.facts.budget_levels:
+                if level == budget_level:
+                    rows = index.query(continent, dest_type, max_budget=high, min_budget=low)
+                    names.extend(index.names[row] for row in rows)
+            return names
+    
+    def destinations_within_budget(self, max_budget):
+        """Python equivalent of destinations_within_budget/2"""
+        self._ensure_index()
+        with self._index_lock:
+            index = self.index
+            return [index.names[row] for row in index.query(max_budget=max_budget)]
+    
+    def cheapest_in_continent(self, continent):
+        """Python equivalent of cheapest_in_continent/3 as (name, cost) pairs, ties included"""
+        self._ensure_index()
+        with self._index_lock:
+            index = self.index
+            rows = index.query(continent)
+            if not rows:
+                return []
+            cheapest = min(index.costs[row] for row in rows)
+            return [(index.names[row], cheapest) for row in rows if index.costs[row] == cheapest]
+    
+    def similar_destinations(self, destination_name, max_price_difference):
+        """Python equivalent of similar_destinations/3: same type, cost within max_price_difference"""
+        self._ensure_index()
+        with self._index_lock:
+            index = self.index
+            row = index.row_ids.get(destination_name)
+            if row is None:
+                return []
+            return [index.names[other] for other in self.similarity_index.similar(row, max_price_difference)]
+    
+    @tracer.traced('agent.similar')
+    def similar_destinations_batch(self, destinations, k=3, max_price_difference=None):
+        """Names of the k closest-priced destinations of the same type for each destination"""
+        self._ensure_index()
+        with self._index_lock:
+            return self._similar_batch(destinations, k, max_price_difference)
+    
+    def _similar_batch(self, destinations, k, max_price_difference):
+        """similar_destinations_batch without the KB stamp check; call with _index_lock held"""
+        index = self.index
+        similarity_index = self.similarity_index
+        results = []
+        for dest in destinations:
+            row = index.row_ids.get(dest['name'])
+            if row is None:
+                results.append([])
+                continue
+            results.append([index.names[other] for other in similarity_index.top_k(row, k, max_price_difference)])
+        return results
+    
+    def analytics(self):
+        """CostAnalytics over the current destinations (needs NumPy)"""
+        self._ensure_index()
+        with self._index_lock:
+            if self._analytics is None or self._analytics_version != self.kb_version:
+                self._analytics = CostAnalytics(self.index)
+                self._analytics_version = self.kb_version
+            return self._analytics
+    
+    def budget_band_counts(self):
+        """Destinations per budget_level/3 band per continent: {continent: {level: count}}"""
+        return self.analytics().budget_band_counts(self.facts.budget_levels)
+    
+    def cost_stats_by_type(self):
+        """Min, median, mean and max cost per destination type"""
+        return self.analytics().cost_stats_by_type()
+    
+    def cheapest_per_continent(self):
+        """cheapest_in_continent/3 for every continent at once: {continent: (cost, names)}"""
+        return self.analytics().cheapest_per_continent()
+    
+    def count_within_budgets(self, thresholds, continent=None, dest_type=None):
+        """Number of destinations within each of a batch of budget thresholds"""
+        return self.analytics().count_within_budgets(thresholds, continent, dest_type)
+    
+    def ranker(self, sort_by='relevance', weights=None, month=None, max_budget=None, activities=None):
+        """Ranker scoring destinations against this knowledge base's seasons and activities"""
+        return Ranker(self._season_for, self.facts.activities, sort_by, weights, month, max_budget, activities)
+    
+    def rank_destinations(self, destinations, k=20, **ranking):
+        """The k best destinations, best first, keeping only a k-sized heap"""
+        return self.ranker(**ranking).top_k(destinations, k)
+    
+    def iter_ranked(self, destinations, **ranking):
+        """Every destination lazily in rank order"""
+        return self.ranker(**ranking).iter_ranked(destinations, RESULTS_PAGE_SIZE)
+    
+    def trip_planner(self, stops, people=1, budget=None, window=None, activities=None, k=3,
+                     time_budget=2.0, continent=None, dest_type=None):
+        """TripPlanner for N-stop itineraries over the matching destinations
+        
+        budget is the total for the whole group, window a (first, last)
+        month pair or a list of months, and activities must all be offered
+        by at least one stop.
+        """
+        self._ensure_index()
+        max_budget = float(budget) / people if budget and people > 0 else None
+        with self._index_lock:
+            index = self.index
+            destinations = index.rows(index.query(continent, dest_type, max_budget))
+        stop_budget = float(budget) / (stops * people) if budget and stops > 0 and people > 0 else None
+        ranker = self.ranker(max_budget=stop_budget, activities=activities)
+        return TripPlanner(destinations, self._season_for, self.facts.activities, ranker, stops, people,
+                           budget, window, activities, k, time_budget)
+    
+    def plan_trips(self, stops, people=1, budget=None, window=None, activities=None, k=3,
+                   time_budget=2.0, continent=None, dest_type=None):
+        """The k best plans found within time_budget seconds, best first"""
+        return self.trip_planner(stops, people, budget, window, activities, k, time_budget,
+                                 continent, dest_type).best_plans()
+    
+    def iter_trip_plans(self, stops, people=1, budget=None, window=None, activities=None, k=3,
+                        time_budget=2.0, continent=None, dest_type=None):
+        """Each plan as it enters the top k, for showing improving results while searching"""
+        return self.trip_planner(stops, people, budget, window, activities, k, time_budget,
+                                 continent, dest_type).iter_plans()
+    
+    def _season_for(self, dest):
+        return self.destination_seasons.get(dest['name']) or season_entry(dest['type'], dest['continent'])
+    
+    def get_best_season(self, destination_name, destination_type, continent):
+        """Determine best season to visit based on destination characteristics"""
+        season_info = self.destination_seasons.get(destination_name)
+        if season_info is None:
+            season_info = season_entry(destination_type, continent)
+        return season_info
+    
+    def _card_cache(self):
+        """Card cache for the current kb_version; call with _index_lock held"""
+        if self._cards_version != self.kb_version:
+            self._cards = {}
+            self._cards_version = self.kb_version
+        return self._cards
+    
+    def render_cards(self, destinations):
+        """Result card text for each destination, rendered once per destination and KB version"""
+        # Checked before taking _index_lock: a reload takes _lock, which
+        # the delta path holds while it waits for _index_lock
+        self._ensure_index()
+        with self._index_lock:
+            return self._render_cards(destinations)
+    
+    def _render_cards(self, destinations):
+        """render_cards without the KB stamp check; call with _index_lock held"""
+        cards = self._card_cache()
+        missing = [dest for dest in destinations if dest['name'] not in cards]
+        tracer.count('cards.cache_hits', len(destinations) - len(missing))
+        if missing:
+            # Best season and similar destinations for all misses at once
+            seasons = self.get_best_season_batch(missing)
+            with tracer.span('agent.similar'):
+                similar = self._similar_batch(missing, SIMILAR_PER_CARD, SIMILAR_MAX_PRICE_DIFFERENCE)
+            with tracer.span('render.cards', cards=len(missing)):
+                for dest, season_info, similar_names in zip(missing, seasons, similar):
+                    cards[dest['name']] = render_destination_card(dest, season_info, similar_names)
+            tracer.count('cards.rendered', len(missing))
+        return [cards[dest['name']] for dest in destinations]
+    
+    @tracer.traced('agent.render_all_cards')
+    def render_all_cards(self):
+        """Render and cache the card of every destination up front
         
-        return base_reason + continent_notes.get(continent, "")
+        The index lock is taken one page at a time so searches can render
+        in between; the pass stops early if the KB changes under it.
+        """
+        self._ensure_index()
+        with self._index_lock:
+            index = self.index
+            version = self.kb_version
+            rows = index.query()
+        for start in range(0, len(rows), RESULTS_PAGE_SIZE):
+            with self._index_lock:
+                if self.kb_version != version:
+                    return
+                self._render_cards(index.rows(rows[start:start + RESULTS_PAGE_SIZE]))
+    
+    def clear_card_cache(self):
+        with self._index_lock:
+            self._cards = {}
+    
+    @tracer.traced('agent.seasons')
+    def get_best_season_batch(self, destinations):
+        """Season info for a whole result set, in the same order"""
+        destination_seasons = self.destination_seasons
+        return [
+            destination_seasons.get(dest['name']) or season_entry(dest['type'], dest['continent'])
+            for dest in destinations
+        ]
 
 class ModernTravelGUI:
     def __init__(self, root):
@@ -133,9 +871,87 @@ class ModernTravelGUI:
         # Configure style
         self.configure_styles()
         
-        self.travel_agent = SimpleTravelAgent()
+        # The agent loads on the search pool once the window has painted;
+        # searches issued before then wait in pending_search
+        self.travel_agent = None
+        self.agent_future = None
+        self.pending_search = False
+        # Why the last load failed; searches then offer to retry it
+        self.load_error = None
         self.current_destinations = []
+        
+        # Milliseconds since STARTUP_STARTED for each startup stage
+        self.startup_times = {'imports': round((IMPORTS_DONE - STARTUP_STARTED) * 1000, 1)}
+        
+        # Paging state for the result cards still to be inserted
+        self.result_cards = None
+        self.results_shown = 0
+        self.page_pending = False
+        
+        # Searches run on a worker pool and report back through a queue
+        self.search_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="search")
+        self.search_queue = queue.Queue()
+        self.search_generation = 0
+        self.search_future = None
+        self.polling_search = False
+        
+        # Tracing overlay, toggled with F12
+        self.debug_panel = None
+        self.debug_text = None
+        self.tracing_var = None
+        
         self.create_gui()
+        self.mark_startup('window_built')
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.bind("<F12>", self.toggle_debug_panel)
+        tracer.listeners.append(self.on_search_traced)
+        self.root.after_idle(self.start_loading)
+    
+    def start_loading(self):
+        """Runs once the window has painted: load the knowledge base off the Tk thread"""
+        self.mark_startup('first_paint')
+        self.results_title.config(text="⏳ Loading knowledge base...")
+        self.search_progress.pack(side='right', padx=20)
+        self.search_progress.start(15)
+        self.agent_future = self.search_pool.submit(SimpleTravelAgent, fast_path=True)
+        self.root.after(50, self.poll_agent_loading)
+    
+    def poll_agent_loading(self):
+        if not self.agent_future.done():
+            self.root.after(50, self.poll_agent_loading)
+            return
+        self.search_progress.stop()
+        self.search_progress.pack_forget()
+        try:
+            self.travel_agent = self.agent_future.result()
+        except Exception as e:
+            self.load_error = e
+            self.pending_search = False
+            self.results_title.config(text="⚠️ Knowledge base failed to load")
+            self.show_error(f"Failed to load the knowledge base: {e}")
+            return
+        self.mark_startup('kb_loaded')
+        self.results_title.config(text="📋 Search Results")
+        if self.pending_search:
+            self.pending_search = False
+            self.search_destinations()
+        # Render every card on the other worker; searches do not wait for it
+        self.search_pool.submit(self.travel_agent.render_all_cards)
+    
+    def mark_startup(self, stage):
+        self.startup_times.setdefault(stage, round((time.perf_counter() - STARTUP_STARTED) * 1000, 1))
+    
+    def report_startup(self):
+        """Print the startup timings, appending them to $TRAVEL_STARTUP_REPORT if set"""
+        print("Startup (ms): " + ", ".join(f"{stage} {ms}" for stage, ms in self.startup_times.items()))
+        report_path = os.environ.get('TRAVEL_STARTUP_REPORT')
+        if report_path:
+            record = dict(self.startup_times, timestamp=datetime.now().isoformat(timespec='seconds'))
+            try:
+                with open(report_path, 'a') as f:
+                    f.write(json.dumps(record) + "\n")
+            except OSError as e:
+                print(f"Error writing startup report: {e}")
     
     def configure_styles(self):
         style = ttk.Style()
@@ -259,6 +1075,11 @@ class ModernTravelGUI:
         self.continent_var = tk.StringVar(value="Any")
         self.type_var = tk.StringVar(value="Any")
         self.budget_var = tk.StringVar()
+        self.activities_var = tk.StringVar()
+        self.activity_match_var = tk.StringVar(value="All")
+        # Knowledge base order needs no scoring, so the first page shows at once
+        self.sort_var = tk.StringVar(value="Knowledge base order")
+        self.month_var = tk.StringVar(value="Any")
         
         for i, (label, default, options) in enumerate(criteria):
             # Label with modern styling
@@ -294,12 +1115,54 @@ class ModernTravelGUI:
                               command=self.search_destinations)
         search_btn.grid(row=1, column=6, columnspan=2, padx=(20, 0), pady=8, sticky='e')
         
+        # Activity filter
+        self.create_activity_filter(inner_frame)
+        
+        # Result ordering
+        self.create_sort_controls(inner_frame)
+        
         # Quick filters
         self.create_quick_filters(inner_frame)
     
+    def create_activity_filter(self, parent):
+        activity_frame = tk.Frame(parent, bg=self.colors['card_bg'])
+        activity_frame.grid(row=2, column=0, columnspan=8, sticky='w', pady=(8, 0))
+        
+        tk.Label(activity_frame, text="Activities:", font=('Arial', 11, 'bold'),
+                fg=self.colors['dark'], bg=self.colors['card_bg']).pack(side='left', padx=(0, 12))
+        
+        ttk.Entry(activity_frame, textvariable=self.activities_var,
+                 width=40, font=('Arial', 10)).pack(side='left', padx=(0, 12))
+        
+        tk.Label(activity_frame, text="Match:", font=('Arial', 11, 'bold'),
+                fg=self.colors['dark'], bg=self.colors['card_bg']).pack(side='left', padx=(0, 12))
+        
+        ttk.Combobox(activity_frame, textvariable=self.activity_match_var, values=["All", "Any"],
+                    state="readonly", width=6, font=('Arial', 10)).pack(side='left', padx=(0, 12))
+        
+        tk.Label(activity_frame, text="e.g. hiking, skiing", font=('Arial', 10),
+                fg=self.colors['text_light'], bg=self.colors['card_bg']).pack(side='left')
+    
+    def create_sort_controls(self, parent):
+        sort_frame = tk.Frame(parent, bg=self.colors['card_bg'])
+        sort_frame.grid(row=3, column=0, columnspan=8, sticky='w', pady=(8, 0))
+        
+        tk.Label(sort_frame, text="Sort by:", font=('Arial', 11, 'bold'),
+                fg=self.colors['dark'], bg=self.colors['card_bg']).pack(side='left', padx=(0, 12))
+        
+        ttk.Combobox(sort_frame, textvariable=self.sort_var, values=list(SORT_CHOICES),
+                    state="readonly", width=20, font=('Arial', 10)).pack(side='left', padx=(0, 25))
+        
+        tk.Label(sort_frame, text="Travel month:", font=('Arial', 11, 'bold'),
+                fg=self.colors['dark'], bg=self.colors['card_bg']).pack(side='left', padx=(0, 12))
+        
+        ttk.Combobox(sort_frame, textvariable=self.month_var,
+                    values=["Any"] + [month.title() for month in MONTHS],
+                    state="readonly", width=12, font=('Arial', 10)).pack(side='left')
+    
     def create_quick_filters(self, parent):
         quick_filters_frame = tk.Frame(parent, bg=self.colors['card_bg'])
-        quick_filters_frame.grid(row=2, column=0, columnspan=8, sticky='w', pady=(15, 0))
+        quick_filters_frame.grid(row=4, column=0, columnspan=8, sticky='w', pady=(15, 0))
         
         tk.Label(quick_filters_frame, text="Quick filters:", font=('Arial', 11, 'bold'),
                 fg=self.colors['dark'], bg=self.colors['card_bg']).pack(side='left', padx=(0, 15))
@@ -340,7 +1203,9 @@ class ModernTravelGUI:
                                     font=('Arial', 16, 'bold'),
                                     fg=self.colors['primary'],
                                     bg=self.colors['card_bg'])
-        self.results_title.pack(anchor='w', padx=20, pady=12)
+        self.results_title.pack(side='left', anchor='w', padx=20, pady=12)
+        
+        self.search_progress = ttk.Progressbar(results_header, mode='indeterminate', length=160)
         
         results_frame = tk.Frame(results_container, 
                                 bg=self.colors['card_bg'], 
@@ -362,6 +1227,8 @@ class ModernTravelGUI:
             selectbackground=self.colors['light']
         )
         self.results_text.pack(fill=tk.BOTH, expand=True, padx=2, pady=2)
+        self.results_text.configure(yscrollcommand=self.on_results_scroll)
+        self.results_text.tag_configure("more_marker", foreground=self.colors['text_light'])
     
     def create_footer(self, parent):
         footer_frame = tk.Frame(parent, bg=self.colors['footer_bg'], height=50)
@@ -384,6 +1251,7 @@ class ModernTravelGUI:
             self.type_var.set(filter_type)
             self.continent_var.set("Any")
             self.budget_var.set("")
+        self.activities_var.set("")
         
         self.search_destinations()
     
@@ -400,6 +1268,7 @@ Now get personalized advice on when to visit each destination for the best exper
 • Select a continent or choose 'Any' to search worldwide
 • Pick your preferred travel type (beach, city, historical, etc.)
 • Set a maximum budget to find affordable options
+• List activities (e.g. hiking, skiing) and match all or any of them
 • Use quick filters for instant results
 • Get automatic best season advice for each destination
 
@@ -429,25 +1298,122 @@ Click 'Find Destinations' to start your journey!
                 self.show_error("Please enter a valid budget amount")
                 return
         
+        if self.travel_agent is None:
+            if self.load_error is not None:
+                retry = messagebox.askretrycancel(
+                    "Oops! 🚫", f"The knowledge base failed to load: {self.load_error}\n\nTry loading it again?",
+                    parent=self.root
+                )
+                if not retry:
+                    return
+                self.load_error = None
+                self.start_loading()
+            # Re-run by poll_agent_loading with the then-current filters
+            self.pending_search = True
+            self.results_title.config(text="⏳ Loading knowledge base... your search will start shortly")
+            return
+        
         # Convert "Any" to None for filtering
         continent = None if continent == "Any" else continent
         dest_type = None if dest_type == "Any" else dest_type
         
+        # Activities are typed as a comma separated list of KB atoms
+        activities = [
+            activity.strip().lower().replace(' ', '_')
+            for activity in self.activities_var.get().split(',') if activity.strip()
+        ]
+        criteria = {
+            'continent': continent,
+            'dest_type': dest_type,
+            'max_budget': max_budget,
+            'activities': activities or None,
+            'match_all': self.activity_match_var.get() != "Any"
+        }
+        ranking = {
+            'sort_by': SORT_CHOICES.get(self.sort_var.get()),
+            'month': None if self.month_var.get() == "Any" else self.month_var.get()
+        }
+        
+        # A newer search supersedes any search still queued or running
+        self.search_generation += 1
+        trace = tracer.start_search(", ".join(f"{key}={value}" for key, value in criteria.items() if value))
+        if self.search_future is not None:
+            self.search_future.cancel()
+        
         # Update UI to show searching state
         self.results_title.config(text="🔍 Searching...")
-        self.results_text.delete(1.0, tk.END)
-        self.results_text.insert(1.0, "Searching for perfect destinations...")
-        self.root.update()
+        self.display_results("Searching for perfect destinations...", "")
+        self.search_progress.pack(side='right', padx=20)
+        self.search_progress.start(15)
         
-        # Search for destinations
-        results = self.travel_agent.recommend_destinations(continent, dest_type, max_budget)
-        self.current_destinations = results
-        self.display_search_results(results, continent, dest_type, max_budget)
+        self.search_future = self.search_pool.submit(self.run_search, self.search_generation,
+                                                     criteria, ranking, trace)
+        if not self.polling_search:
+            self.polling_search = True
+            self.root.after(16, self.poll_search_results)
     
-    def display_search_results(self, destinations, continent, dest_type, max_budget):
+    def run_search(self, generation, criteria, ranking=None, trace=None):
+        """Worker thread: query the agent and render the first page off the Tk thread"""
+        try:
+            with tracer.activate(trace), tracer.span('gui.search'):
+                results = self.travel_agent.recommend_destinations(**criteria)
+                if generation != self.search_generation:
+                    return
+                ordered = None
+                if ranking and ranking['sort_by']:
+                    # Ranked lazily: only the pages actually shown get ordered
+                    ordered = self.travel_agent.iter_ranked(
+                        results, sort_by=ranking['sort_by'], month=ranking['month'],
+                        max_budget=criteria['max_budget'], activities=criteria['activities']
+                    )
+                with tracer.span('gui.prepare'):
+                    page = self.prepare_search_results(results, **criteria, ordered=ordered,
+                                                       ranking=ranking)
+            self.search_queue.put((generation, results, page, None, trace))
+        except Exception as e:
+            self.search_queue.put((generation, None, None, e, trace))
+    
+    def poll_search_results(self):
+        """Drain finished searches on the Tk thread, ignoring superseded ones"""
+        while True:
+            try:
+                generation, results, page, error, trace = self.search_queue.get_nowait()
+            except queue.Empty:
+                break
+            if generation != self.search_generation:
+                continue
+            self.search_future = None
+            self.search_progress.stop()
+            self.search_progress.pack_forget()
+            if error is not None:
+                tracer.finish_search(trace)
+                self.results_title.config(text="📋 Search Results")
+                self.show_error(f"Search failed: {error}")
+                continue
+            with tracer.activate(trace), tracer.span('gui.insert'):
+                self.show_result_page(results, *page)
+            tracer.finish_search(trace)
+            if 'first_search' not in self.startup_times:
+                self.mark_startup('first_search')
+                self.report_startup()
+        
+        if self.search_future is None:
+            self.polling_search = False
+        else:
+            self.root.after(16, self.poll_search_results)
+    
+    def display_search_results(self, destinations, continent, dest_type, max_budget, **criteria):
         """Display search results in a beautiful format"""
+        page = self.prepare_search_results(destinations, continent, dest_type, max_budget, **criteria)
+        self.show_result_page(destinations, *page)
+    
+    def prepare_search_results(self, destinations, continent, dest_type, max_budget,
+                               activities=None, match_all=True, ordered=None, ranking=None):
+        """Return (title, first page text, remaining cards); safe to call from a worker thread
+        
+        ordered optionally gives the destinations in display order (e.g. ranked).
+        """
         if not destinations:
-            self.results_title.config(text=" Select another choice")
             no_results = """
 😔 No destinations found matching your criteria.
 
@@ -458,10 +1424,7 @@ Click 'Find Destinations' to start your journey!
 
 Ready to try again?
 """
-            self.display_results(no_results, "")
-            return
-        
-        self.results_title.config(text=f"🎯 Found {len(destinations)} Destination(s)")
+            return " Select another choice", no_results, None
         
         results_text = ""
         
@@ -473,63 +1436,170 @@ Ready to try again?
             filters_applied.append(f"🎯 {dest_type.title()}")
         if max_budget:
             filters_applied.append(f"💰 ${max_budget}")
+        if activities:
+            joiner = " + " if match_all else " / "
+            filters_applied.append("🧭 " + joiner.join(a.replace('_', ' ') for a in activities))
+        if ranking and ranking.get('month'):
+            filters_applied.append(f"📅 {ranking['month']}")
+        if ranking and ranking.get('sort_by'):
+            label = next(label for label, sort_by in SORT_CHOICES.items() if sort_by == ranking['sort_by'])
+            filters_applied.append(f"↕️ {label}")
         
         if filters_applied:
             results_text += "📊 Search Filters: " + " • ".join(filters_applied) + "\n\n"
             results_text += "="*60 + "\n\n"
         
-        # Display each destination as a card-like entry
-        for i, dest in enumerate(destinations, 1):
-            # Get best season information
-            season_info = self.travel_agent.get_best_season(
-                dest['name'], dest['type'], dest['continent']
-            )
-            
-            # Destination header with emoji based on type
-            type_emojis = {
-                'beach': '🏖️', 'mountain': '⛰️', 'city': '🏙️',
-                'historical': '🏛️', 'adventure': '🎯'
-            }
-            emoji = type_emojis.get(dest['type'], '📍')
-            
-            results_text += f"{emoji} {dest['name'].title()}, {dest['country'].title()}\n"
-            results_text += f"   🌐 {dest['continent'].replace('_', ' ').title()}"
-            results_text += f" • 🎯 {dest['type'].title()}"
-            results_text += f" • 💰 ${dest['cost']} per person\n"
-            
-            # Add rating stars based on cost (inverse relationship for demo)
-            rating = max(1, min(5, 6 - dest['cost'] // 400))
-            results_text += f"   ⭐ {'★' * rating}{'☆' * (5 - rating)} Value Rating\n"
-            
-            results_text += f"\n   🌤️Best Time to Visit: {season_info['best_season']}\n"
-            results_text += f"   💡 Why: {season_info['reason']}\n"
-            
-            if season_info['alternative_seasons']:
-                results_text += f"   🌈 Also Good: {', '.join(season_info['alternative_seasons'])}\n"
-            
-            results_text += "\n" + "-"*50 + "\n\n"
-        
-        results_text += f"\n🎉 Found {len(destinations)} perfect destination(s) for you!\n\n"
-        results_text += "💡 Tip: Consider the seasonal recommendations when planning your trip for the best experience!"
+        # Only the first page is rendered up front; the rest stays lazy
+        cards = self.iter_result_cards(destinations if ordered is None else ordered)
+        results_text += "".join(islice(cards, RESULTS_PAGE_SIZE))
         
-        self.display_results(results_text, "")
+        return f"🎯 Found {len(destinations)} Destination(s)", results_text, cards
+    
+    def iter_result_cards(self, destinations):
+        """Lazily render one card per destination"""
+        return iter_result_cards(self.travel_agent, destinations)
+    
+    def show_result_page(self, destinations, title, text, cards):
+        """Show the first page of results and arm loading of the rest"""
+        self.current_destinations = destinations
+        self.results_title.config(text=title)
+        self.display_results(text, "")
+        if cards is None:
+            return
+        self.result_cards = cards
+        self.results_shown = min(len(destinations), RESULTS_PAGE_SIZE)
+        self.finish_result_page()
+    
+    def load_next_page(self):
+        """Append the next page of cards to the results widget"""
+        self.page_pending = False
+        if self.result_cards is None:
+            return
+        if self.results_text.tag_ranges("more_marker"):
+            self.results_text.delete("more_marker.first", "more_marker.last")
+        with tracer.span('gui.insert_page'):
+            self.results_text.insert(tk.END, "".join(islice(self.result_cards, RESULTS_PAGE_SIZE)))
+        self.results_shown = min(len(self.current_destinations), self.results_shown + RESULTS_PAGE_SIZE)
+        self.finish_result_page()
+    
+    def finish_result_page(self):
+        """Add the 'more results' marker, or the summary once every card is shown"""
+        total = len(self.current_destinations)
+        if self.results_shown < total:
+            self.results_text.insert(tk.END,
+                                     f"⏬ Showing {self.results_shown} of {total} - scroll for more\n",
+                                     "more_marker")
+            return
+        self.result_cards = None
+        self.results_text.insert(tk.END, f"\n🎉 Found {total} perfect destination(s) for you!\n\n")
+        self.results_text.insert(tk.END, "💡 Tip: Consider the seasonal recommendations when planning your trip for the best experience!")
+    
+    def on_results_scroll(self, first, last):
+        """Scrollbar callback that loads another page near the bottom"""
+        self.results_text.vbar.set(first, last)
+        if self.result_cards is not None and not self.page_pending and float(last) > 0.9:
+            self.page_pending = True
+            self.root.after_idle(self.load_next_page)
     
     def display_results(self, text, title):
         """Display text in results area"""
+        self.result_cards = None
         self.results_text.delete(1.0, tk.END)
         if title:
             self.results_text.insert(1.0, f"{title}\n{'='*40}\n\n")
         self.results_text.insert(tk.END, text)
+        tracer.count('gui.chars_inserted', len(text))
         
         # Configure tags for better formatting
         self.results_text.tag_configure("bold", font=('Arial', 10, 'bold'))
         self.results_text.tag_configure("highlight", background='#e8f4f8')
     
+    def toggle_debug_panel(self, event=None):
+        """Show or hide the tracing overlay with the last few searches"""
+        if self.debug_panel is not None:
+            self.debug_panel.destroy()
+            self.debug_panel = None
+            self.debug_text = None
+            return
+        
+        self.debug_panel = tk.Toplevel(self.root)
+        self.debug_panel.title("🔬 Search Profiler")
+        self.debug_panel.geometry("640x480")
+        self.debug_panel.protocol("WM_DELETE_WINDOW", self.toggle_debug_panel)
+        
+        toolbar = tk.Frame(self.debug_panel, bg=self.colors['light'])
+        toolbar.pack(fill=tk.X)
+        
+        self.tracing_var = tk.BooleanVar(value=tracer.enabled)
+        tk.Checkbutton(toolbar, text="Tracing enabled", variable=self.tracing_var,
+                      bg=self.colors['light'], command=self.set_tracing).pack(side='left', padx=8, pady=6)
+        
+        for text, command in (("Export JSONL", lambda: self.export_trace('.jsonl')),
+                              ("Export Chrome trace", lambda: self.export_trace('.json')),
+                              ("Clear", self.clear_trace)):
+            tk.Button(toolbar, text=text, font=('Arial', 10), relief='flat', bg='#e0f2fe',
+                     command=command).pack(side='left', padx=4, pady=6)
+        
+        self.debug_text = scrolledtext.ScrolledText(self.debug_panel, font=('Courier', 10),
+                                                    wrap=tk.NONE, relief='flat')
+        self.debug_text.pack(fill=tk.BOTH, expand=True)
+        self.refresh_debug_panel()
+    
+    def refresh_debug_panel(self):
+        if self.debug_text is None:
+            return
+        searches = list(tracer.searches)[-DEBUG_PANEL_SEARCHES:]
+        text = "Startup (ms): " + ", ".join(f"{stage} {ms}" for stage, ms in self.startup_times.items()) + "\n\n"
+        if searches:
+            text += "\n\n".join(format_search(record) for record in reversed(searches))
+        elif tracer.enabled:
+            text += "No searches traced yet."
+        else:
+            text += "Tracing is off. Tick 'Tracing enabled' or start with TRAVEL_TRACE=1."
+        self.debug_text.delete(1.0, tk.END)
+        self.debug_text.insert(tk.END, text)
+    
+    def on_search_traced(self, record):
+        """Tracer listener; finished searches are reported on the Tk thread"""
+        self.refresh_debug_panel()
+    
+    def set_tracing(self):
+        tracer.enabled = self.tracing_var.get()
+        self.refresh_debug_panel()
+    
+    def clear_trace(self):
+        tracer.clear()
+        self.refresh_debug_panel()
+    
+    def export_trace(self, extension):
+        path = filedialog.asksaveasfilename(parent=self.debug_panel, defaultextension=extension,
+                                            initialfile=f"travel_trace{extension}")
+        if not path:
+            return
+        try:
+            if extension == '.json':
+                tracer.export_chrome(path)
+            else:
+                tracer.export_jsonl(path)
+        except OSError as e:
+            self.show_error(f"Could not write trace: {e}")
+    
     def show_error(self, message):
         """Show error message in a modern way"""
         messagebox.showerror("Oops! 🚫", message, parent=self.root)
+    
+    def on_close(self):
+        """Stop pending searches before tearing down the window"""
+        self.search_generation += 1
+        self.search_pool.shutdown(wait=False, cancel_futures=True)
+        if self.on_search_traced in tracer.listeners:
+            tracer.listeners.remove(self.on_search_traced)
+        self.root.destroy()
 
 def main():
+    if tk is None:
+        print("Tkinter is not available; use travel_server.py for headless mode")
+        return
     try:
         root = tk.Tk()
         app = ModernTravelGUI(root)
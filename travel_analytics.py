@@ -0,0 +1,109 @@
+"""Vectorized cost aggregates for dashboards
+
+Built from a DestinationIndex: the costs of the live rows become one NumPy
+array next to the continent and type codes, so each aggregate is a few
+whole-array passes (bincount, lexsort, searchsorted) rather than one
+Prolog inference per fact. NumPy is optional and only imported when
+analytics are first used.
+"""
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("Cost analytics need NumPy (pip install numpy)") from None
+    return numpy
+
+
+class CostAnalytics:
+    """Snapshot of the destination index as NumPy arrays"""
+
+    def __init__(self, destination_index):
+        np = self.np = _numpy()
+        self.index = destination_index
+        # The index's typed arrays are read through the buffer protocol without a copy
+        self.rows = np.frombuffer(destination_index.live_rows, dtype=np.uint32).astype(np.int64)
+        self.costs = np.array(destination_index.costs)[self.rows]
+        self.continent_codes = np.frombuffer(destination_index.continent_codes, dtype=np.uint16)[self.rows].astype(np.int64)
+        self.type_codes = np.frombuffer(destination_index.type_codes, dtype=np.uint16)[self.rows].astype(np.int64)
+        self.continents = list(destination_index.continents)
+        self.types = list(destination_index.types)
+
+    def _mask(self, continent=None, dest_type=None):
+        """Boolean row mask for optional continent/type filters, or None if one is unknown"""
+        mask = self.np.ones(len(self.rows), dtype=bool)
+        for value, labels, codes in ((continent, self.continents, self.continent_codes),
+                                     (dest_type, self.types, self.type_codes)):
+            if value is None:
+                continue
+            if value not in labels:
+                return None
+            mask &= codes == labels.index(value)
+        return mask
+
+    def budget_band_counts(self, budget_levels):
+        """{continent: {level: count}} for budget_level/3 style (level, min, max) bands"""
+        np = self.np
+        result = {continent: {} for continent in self._present(self.continent_codes, self.continents)}
+        for level, low, high in budget_levels:
+            in_band = (self.costs >= low) & (self.costs <= high)
+            counts = np.bincount(self.continent_codes[in_band], minlength=len(self.continents))
+            for continent in result:
+                result[continent][level] = int(counts[self.continents.index(continent)])
+        return result
+
+    def cost_stats_by_type(self):
+        """{type: {'count', 'min', 'median', 'mean', 'max'}} from one lexsort"""
+        np = self.np
+        order = np.lexsort((self.costs, self.type_codes))
+        costs = self.costs[order]
+        counts = np.bincount(self.type_codes, minlength=len(self.types))
+        ends = np.cumsum(counts)
+        starts = ends - counts
+        sums = np.bincount(self.type_codes, weights=self.costs, minlength=len(self.types))
+        stats = {}
+        for code, dest_type in enumerate(self.types):
+            count = int(counts[code])
+            if not count:
+                continue
+            start = int(starts[code])
+            end = int(ends[code])
+            stats[dest_type] = {
+                'count': count,
+                'min': costs[start].item(),
+                'median': (costs[(start + end - 1) // 2] + costs[(start + end) // 2]).item() / 2,
+                'mean': float(sums[code] / count),
+                'max': costs[end - 1].item()
+            }
+        return stats
+
+    def cheapest_per_continent(self):
+        """{continent: (cost, [names])}, ties included in KB order"""
+        np = self.np
+        if not len(self.rows):
+            return {}
+        minimums = np.full(len(self.continents), np.inf)
+        np.minimum.at(minimums, self.continent_codes, self.costs)
+        cheapest = self.rows[self.costs == minimums[self.continent_codes]]
+        result = {}
+        names = self.index.names
+        for row in cheapest.tolist():
+            continent = self.continents[self.index.continent_codes[row]]
+            entry = result.setdefault(continent, (self.index.costs[row], []))
+            entry[1].append(names[row])
+        return result
+
+    def count_within_budgets(self, thresholds, continent=None, dest_type=None):
+        """Destinations costing at most each threshold, for a whole batch of thresholds"""
+        np = self.np
+        mask = self._mask(continent, dest_type)
+        if mask is None:
+            return [0] * len(thresholds)
+        costs = np.sort(self.costs[mask])
+        return np.searchsorted(costs, np.asarray(thresholds, dtype=float), side='right').tolist()
+
+    def _present(self, codes, labels):
+        """Labels that occur among the live rows, in code order"""
+        counts = self.np.bincount(codes, minlength=len(labels))
+        return [label for code, label in enumerate(labels) if counts[code]]
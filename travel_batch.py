@@ -0,0 +1,214 @@
+"""Offline batch recommendations for bulk preference files
+
+    python travel_batch.py preferences.csv -o recommendations.jsonl --workers 8
+    python travel_batch.py preferences.jsonl -o recommendations.jsonl --resume
+
+Input records (CSV columns or JSON keys, all optional):
+
+    id, continent, type, max_budget, activities, match_all, people, sort_by, month, limit
+
+CSV activities are separated with ';' or '|'. Each record becomes one JSON
+line in input order with its recommendations and their total cost for
+the group (calculate_total_cost/3). Records are read lazily and at most
+--max-in-flight chunks are queued on the process pool, so memory stays
+bounded. A checkpoint next to the output records how many records and
+output bytes are complete; --resume truncates the output to that point
+and carries on.
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from itertools import islice
+
+from travel_workers import init_worker, worker_agent
+
+FALSE_WORDS = ('0', 'false', 'no', 'any')
+
+
+def read_records(path, fmt=None):
+    """Stream preference records from a CSV or JSON lines file
+
+    A JSON line that does not parse to an object is yielded as a
+    ValueError in its place, so record numbering stays aligned.
+    """
+    fmt = fmt or ('csv' if path.endswith('.csv') else 'jsonl')
+    with open(path, newline='', encoding='utf-8') as f:
+        if fmt == 'csv':
+            for row in csv.DictReader(f):
+                yield {key: value for key, value in row.items() if value not in (None, '')}
+        else:
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    # Reported as an error record by process_chunk
+                    yield ValueError(f"Line {number} is not valid JSON: {e}")
+                    continue
+                if not isinstance(record, dict):
+                    yield ValueError(f"Line {number} is not a JSON object")
+                    continue
+                yield record
+
+
+def _activities(value):
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = value.replace('|', ';').split(';')
+    return [activity.strip() for activity in value if activity.strip()] or None
+
+
+def recommend_record(record, default_limit=10):
+    """Recommendations for one preference record, as a JSON-ready dict"""
+    max_budget = record.get('max_budget')
+    max_budget = float(max_budget) if max_budget not in (None, '') else None
+    activities = _activities(record.get('activities'))
+    match_all = str(record.get('match_all', True)).strip().lower() not in FALSE_WORDS
+    people = int(record.get('people') or 1)
+    limit = int(record.get('limit') or default_limit)
+    agent = worker_agent()
+
+    results = agent.recommend_destinations(record.get('continent'), record.get('type'),
+                                            max_budget, activities, match_all)
+    count = len(results)
+    if record.get('sort_by'):
+        results = agent.rank_destinations(results, limit, sort_by=record['sort_by'],
+                                           month=record.get('month'), max_budget=max_budget,
+                                           activities=activities)
+    else:
+        results = results[:limit]
+    return {
+        'count': count,
+        'people': people,
+        'recommendations': [
+            dict(dest, total_cost=agent.calculate_total_cost(dest['name'], people))
+            for dest in results
+        ]
+    }
+
+
+def process_chunk(chunk, default_limit=10):
+    """Worker: serialize the output lines for a chunk of (index, record) pairs"""
+    lines = []
+    for index, record in chunk:
+        if isinstance(record, ValueError):
+            lines.append(json.dumps({'record': index, 'id': index, 'error': str(record)}) + "\n")
+            continue
+        output = {'record': index, 'id': record.get('id', index)}
+        try:
+            output.update(recommend_record(record, default_limit))
+        except (TypeError, ValueError) as e:
+            output['error'] = str(e)
+        lines.append(json.dumps(output) + "\n")
+    return "".join(lines).encode('utf-8')
+
+
+def load_checkpoint(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_checkpoint(path, state):
+    """Write the checkpoint atomically so an interrupt never leaves half of it"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def run_batch(args):
+    checkpoint_path = args.checkpoint or args.output + '.ckpt'
+    state = {'input': os.path.abspath(args.input), 'records': 0, 'offset': 0, 'complete': False}
+    if args.resume and os.path.exists(checkpoint_path):
+        saved = load_checkpoint(checkpoint_path)
+        if saved['input'] != state['input']:
+            sys.exit(f"{checkpoint_path} belongs to {saved['input']}, not {args.input}")
+        if saved['complete']:
+            print(f"{args.output} is already complete ({saved['records']} records)", file=sys.stderr)
+            return
+        state = saved
+        print(f"Resuming after {state['records']} records", file=sys.stderr)
+
+    records = islice(enumerate(read_records(args.input, args.format)), state['records'], None)
+    chunks = iter(lambda: list(islice(records, args.chunk_size)), [])
+    context = multiprocessing.get_context('spawn')
+    started = time.perf_counter()
+    done_at_start = state['records']
+
+    out = open(args.output, 'r+b' if state['offset'] else 'wb')
+    # Drop anything written after the last checkpoint
+    out.truncate(state['offset'])
+    out.seek(state['offset'])
+    pending = deque()
+    since_checkpoint = 0
+
+    def checkpoint():
+        out.flush()
+        os.fsync(out.fileno())
+        save_checkpoint(checkpoint_path, state)
+        rate = (state['records'] - done_at_start) / max(time.perf_counter() - started, 1e-9)
+        print(f"{state['records']} records done ({rate:.0f}/s)", file=sys.stderr)
+
+    def write_oldest():
+        nonlocal since_checkpoint
+        size, result = pending.popleft()
+        out.write(result.get())
+        state['records'] += size
+        state['offset'] = out.tell()
+        since_checkpoint += 1
+        if since_checkpoint >= args.checkpoint_every:
+            since_checkpoint = 0
+            checkpoint()
+
+    try:
+        with context.Pool(args.workers, initializer=init_worker, initargs=(args.kb, args.fast_path)) as pool:
+            for chunk in chunks:
+                pending.append((len(chunk), pool.apply_async(process_chunk, (chunk, args.limit))))
+                # Results are written in order; the window bounds queued work
+                if len(pending) >= args.max_in_flight:
+                    write_oldest()
+            while pending:
+                write_oldest()
+        state['complete'] = True
+    except KeyboardInterrupt:
+        print("Interrupted; rerun with --resume to continue", file=sys.stderr)
+        sys.exit(130)
+    finally:
+        checkpoint()
+        out.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch TravelExplorer recommendations")
+    parser.add_argument('input', help="CSV or JSON lines preference records")
+    parser.add_argument('-o', '--output', default='recommendations.jsonl')
+    parser.add_argument('--format', choices=['csv', 'jsonl'], default=None,
+                        help="input format (default: from the file extension)")
+    parser.add_argument('--kb', default='travel_kb.pl')
+    parser.add_argument('--fast-path', action='store_true',
+                        help="load ground facts in Python and start Prolog only when needed")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--chunk-size', type=int, default=200, help="records per worker task")
+    parser.add_argument('--max-in-flight', type=int, default=None,
+                        help="chunks queued at once (default: 4 per worker)")
+    parser.add_argument('--limit', type=int, default=10, help="recommendations per record")
+    parser.add_argument('--checkpoint', default=None, help="checkpoint file (default: OUTPUT.ckpt)")
+    parser.add_argument('--checkpoint-every', type=int, default=10, help="chunks between checkpoints")
+    parser.add_argument('--resume', action='store_true', help="continue from the checkpoint")
+    args = parser.parse_args()
+    args.workers = args.workers or os.cpu_count() or 1
+    args.max_in_flight = args.max_in_flight or 4 * args.workers
+    run_batch(args)
+
+
+if __name__ == "__main__":
+    main()
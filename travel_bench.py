@@ -0,0 +1,323 @@
+"""Benchmarks for the search and rendering paths on synthetic knowledge bases
+
+    python travel_bench.py generate --size 100000 --output /tmp/kb_100k.pl
+    python travel_bench.py run --sizes 1000,10000,100000 --output bench_results.json
+    python travel_bench.py compare before.json after.json
+
+Each stage (cold start, consult, query, filter, seasons, render cold and
+cached) is timed separately and reported as throughput, p50/p99 latency
+and peak traced memory. Stages that need SWI-Prolog are skipped when it
+is unavailable.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from itertools import islice
+
+from travel_agent_tkinter import RESULTS_PAGE_SIZE, SimpleTravelAgent, iter_result_cards
+from travel_facts import load_facts
+from travel_snapshot import compile_snapshot, snapshot_path_for
+from travel_workers import percentile
+
+CONTINENTS = {
+    'europe': (0.28, 800, ['france', 'italy', 'spain', 'uk', 'greece', 'switzerland', 'portugal', 'norway']),
+    'asia': (0.25, 700, ['japan', 'indonesia', 'nepal', 'thailand', 'vietnam', 'india', 'china']),
+    'north_america': (0.17, 950, ['usa', 'canada', 'mexico', 'costa_rica']),
+    'south_america': (0.10, 650, ['chile', 'peru', 'brazil', 'argentina', 'colombia']),
+    'africa': (0.10, 750, ['egypt', 'tanzania', 'morocco', 'kenya', 'mauritius', 'south_africa']),
+    'australia': (0.05, 1300, ['australia', 'tasmania']),
+    'oceania': (0.05, 1400, ['newzealand', 'fiji', 'samoa'])
+}
+
+TYPES = {
+    'city': (0.35, 1.0, ['sightseeing', 'museums', 'shopping', 'dining', 'nightlife', 'theater', 'architecture']),
+    'beach': (0.25, 1.1, ['beach', 'snorkeling', 'surfing', 'water_sports', 'sunset_views', 'luxury_resorts']),
+    'mountain': (0.15, 1.15, ['hiking', 'skiing', 'mountain_climbing', 'camping', 'scenic_railways', 'trekking']),
+    'historical': (0.15, 0.9, ['historical_sites', 'museum_visits', 'religious_sites', 'cultural_tours', 'temples']),
+    'adventure': (0.10, 1.25, ['adventure_sports', 'rock_climbing', 'via_ferrata', 'wildlife_viewing', 'rafting'])
+}
+
+GENERAL_ACTIVITIES = ['photography', 'food_tours', 'wine_tasting', 'yoga', 'stargazing', 'wildlife_photography']
+SEASONS = ['spring', 'summer', 'autumn', 'winter', 'dry_season']
+SYLLABLES = ['ka', 'lo', 'mi', 'ra', 'san', 'tor', 'vel', 'na', 'qu', 'bel', 'dor', 'es', 'fin', 'ga', 'hu']
+
+# Criteria mix used by the filter/render stages
+BUDGETS = [None, 500, 700, 900, 1200, 2000]
+
+
+def _weighted(rng, table):
+    keys = list(table)
+    return rng.choices(keys, weights=[table[key][0] for key in keys])[0]
+
+
+def generate_kb(path, size, seed=0, rules_from="travel_kb.pl"):
+    """Write a synthetic knowledge base with size destinations"""
+    rng = random.Random(seed)
+    rules = load_facts(rules_from).other_clauses if rules_from else []
+    directives = [clause for clause in rules if clause.startswith(':-')]
+    rules = [clause for clause in rules if not clause.startswith(':-')]
+
+    destinations = []
+    for i in range(size):
+        continent = _weighted(rng, CONTINENTS)
+        dest_type = _weighted(rng, TYPES)
+        name = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))) + f"_{i}"
+        country = rng.choice(CONTINENTS[continent][2])
+        cost = CONTINENTS[continent][1] * TYPES[dest_type][1] * rng.lognormvariate(0, 0.35)
+        destinations.append((name, country, continent, dest_type, max(100, int(round(cost, -1)))))
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"% Synthetic travel knowledge base: {size} destinations, seed {seed}\n\n")
+        for directive in directives:
+            f.write(directive + "\n")
+        f.write("\n")
+        for dest in destinations:
+            f.write("destination(%s, %s, %s, %s, %d).\n" % dest)
+        for name, _, _, _, _ in destinations:
+            for season in rng.sample(SEASONS, rng.randint(1, 2)):
+                f.write(f"best_season({name}, {season}).\n")
+        for name, _, _, dest_type, _ in destinations:
+            activities = rng.sample(TYPES[dest_type][2], rng.randint(2, 4))
+            activities += rng.sample(GENERAL_ACTIVITIES, rng.randint(1, 2))
+            f.write(f"activities({name}, [{', '.join(activities)}]).\n")
+        f.write("budget_level(low, 0, 500).\nbudget_level(medium, 501, 1000).\nbudget_level(high, 1001, 2000).\n\n")
+        for rule in rules:
+            f.write(rule + "\n\n")
+    return path
+
+
+def summarize(latencies, items=None):
+    """Throughput and latency summary of one stage (latencies in seconds)"""
+    ordered = sorted(latencies)
+    total = sum(ordered)
+    summary = {
+        'runs': len(ordered),
+        'total_s': round(total, 6),
+        'throughput_per_s': round(len(ordered) / total, 2) if total else None,
+        'p50_ms': round(percentile(ordered, 0.50) * 1000, 4),
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 4),
+        'max_ms': round(ordered[-1] * 1000, 4) if ordered else 0.0
+    }
+    if items is not None:
+        summary['items'] = items
+        summary['items_per_s'] = round(items / total, 1) if total else None
+    return summary
+
+
+def time_calls(calls):
+    """Run zero-argument callables, returning their latencies and results"""
+    latencies = []
+    results = []
+    for call in calls:
+        start = time.perf_counter()
+        results.append(call())
+        latencies.append(time.perf_counter() - start)
+    return latencies, results
+
+
+def peak_memory(call):
+    """Peak traced allocation (bytes) while running call once"""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    try:
+        call()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _engine_available():
+    try:
+        from pyswip import Prolog
+        Prolog()
+    except Exception:
+        return False
+    return True
+
+
+def bench_size(kb_path, repeat, cold_repeat, seed, engine):
+    """Benchmark every stage against one knowledge base file"""
+    rng = random.Random(seed)
+    stages = {}
+    snapshot_path = snapshot_path_for(kb_path)
+    if os.path.exists(snapshot_path):
+        os.remove(snapshot_path)
+
+    def stage(name, calls, items=None, memory_call=None):
+        latencies, results = time_calls(calls)
+        stages[name] = summarize(latencies, items(results) if items else None)
+        if memory_call is not None:
+            stages[name]['peak_memory_bytes'] = peak_memory(memory_call)
+        return results
+
+    def cold_start():
+        return SimpleTravelAgent(kb_path, fast_path=True, cache_size=0)
+
+    stage('cold_start_text', [cold_start] * cold_repeat, memory_call=cold_start)
+    stage('snapshot_build', [lambda: compile_snapshot(kb_path)])
+    stage('cold_start_snapshot', [cold_start] * cold_repeat, memory_call=cold_start)
+    agent = cold_start()
+
+    if engine:
+        from pyswip import Prolog
+
+        def consult():
+            Prolog().consult(kb_path)
+
+        stage('consult', [consult] * cold_repeat)
+        engine_agent = SimpleTravelAgent(kb_path, cache_size=0)
+        stage('query', [engine_agent.get_all_destinations] * max(1, repeat // 50),
+              items=lambda results: sum(len(r) for r in results),
+              memory_call=engine_agent.get_all_destinations)
+    else:
+        stages['consult'] = stages['query'] = {'skipped': "SWI-Prolog (pyswip) is not available"}
+
+    continents = agent.index.continents
+    types = agent.index.types
+    activities = agent.get_all_activities()
+    criteria = [
+        (rng.choice([None] + continents), rng.choice([None] + types), rng.choice(BUDGETS))
+        for _ in range(repeat)
+    ]
+    results = stage('filter', [lambda c=c: agent.recommend_destinations(*c) for c in criteria],
+                    items=lambda results: sum(len(r) for r in results),
+                    memory_call=lambda: agent.recommend_destinations())
+
+    activity_queries = [
+        (rng.sample(activities, rng.randint(1, 3)), rng.random() < 0.7) for _ in range(repeat)
+    ]
+    # Posting/bitmap AND or OR alone, then the agent call returning result dicts
+    stage('activity_index',
+          [lambda q=q: agent.activity_index.query(*q) for q in activity_queries],
+          items=lambda results: sum(len(r) for r in results))
+    stage('activity_search',
+          [lambda q=q: agent.search_by_activities(*q) for q in activity_queries],
+          items=lambda results: sum(len(r) for r in results))
+
+    stage('rank_top20', [lambda r=r: agent.rank_destinations(r, 20, month='july') for r in results],
+          items=lambda results: len(criteria))
+
+    pages = [r[:RESULTS_PAGE_SIZE] for r in results if r]
+    stage('season', [lambda p=p: agent.get_best_season_batch(p) for p in pages],
+          items=lambda results: sum(len(r) for r in results))
+    stage('similar', [lambda p=p: agent.similar_destinations_batch(p, 3, 300) for p in pages],
+          items=lambda results: sum(len(r) for r in results))
+
+    def render(destinations, limit=None, cached=False):
+        if not cached:
+            agent.clear_card_cache()
+        return "".join(islice(iter_result_cards(agent, destinations), limit))
+
+    def precompute():
+        agent.clear_card_cache()
+        agent.render_all_cards()
+
+    everything = agent.recommend_destinations()
+    for suffix, cached in (('', False), ('_cached', True)):
+        if cached:
+            stage('precompute_cards', [precompute], memory_call=precompute)
+        stage('render_first_page' + suffix,
+              [lambda r=r: render(r, RESULTS_PAGE_SIZE, cached) for r in results],
+              items=lambda results: len(results))
+        stage('render_all' + suffix, [lambda: render(everything, cached=cached)] * max(1, cold_repeat),
+              items=lambda results: len(everything) * len(results),
+              memory_call=lambda: render(everything, cached=cached))
+
+    if os.path.exists(snapshot_path):
+        os.remove(snapshot_path)
+    return stages
+
+
+def run(args):
+    sizes = [int(size) for size in args.sizes.split(',')]
+    engine = _engine_available() and not args.no_engine
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'engine': engine
+        },
+        'results': {}
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in sizes:
+            kb_path = os.path.join(workdir, f"kb_{size}.pl")
+            start = time.perf_counter()
+            generate_kb(kb_path, size, args.seed, args.rules_from)
+            print(f"[{size}] generated in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+            stages = bench_size(kb_path, args.repeat, args.cold_repeat, args.seed, engine)
+            report['results'][str(size)] = stages
+            for name, summary in stages.items():
+                if 'skipped' in summary:
+                    print(f"[{size}] {name:<20} skipped", file=sys.stderr)
+                else:
+                    print(f"[{size}] {name:<20} p50 {summary['p50_ms']:>10.3f} ms"
+                          f"  p99 {summary['p99_ms']:>10.3f} ms", file=sys.stderr)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}", file=sys.stderr)
+
+
+def compare(args):
+    """Print the relative change of each stage between two result files"""
+    with open(args.before) as f:
+        before = json.load(f)['results']
+    with open(args.after) as f:
+        after = json.load(f)['results']
+    print(f"{'size':>8} {'stage':<20} {'p50 before':>12} {'p50 after':>12} {'change':>8}")
+    for size in sorted(set(before) & set(after), key=int):
+        for name in sorted(set(before[size]) & set(after[size])):
+            old = before[size][name].get('p50_ms')
+            new = after[size][name].get('p50_ms')
+            if old is None or new is None:
+                continue
+            change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+            print(f"{size:>8} {name:<20} {old:>12.3f} {new:>12.3f} {change:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TravelExplorer benchmarks")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    generate_parser = commands.add_parser('generate', help="write a synthetic knowledge base")
+    generate_parser.add_argument('--size', type=int, default=10000)
+    generate_parser.add_argument('--seed', type=int, default=0)
+    generate_parser.add_argument('--output', default='synthetic_kb.pl')
+    generate_parser.add_argument('--rules-from', default='travel_kb.pl')
+
+    run_parser = commands.add_parser('run', help="benchmark every stage at several sizes")
+    run_parser.add_argument('--sizes', default='1000,10000,100000')
+    run_parser.add_argument('--repeat', type=int, default=200, help="queries per stage")
+    run_parser.add_argument('--cold-repeat', type=int, default=3, help="repeats of start-up stages")
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('--rules-from', default='travel_kb.pl')
+    run_parser.add_argument('--no-engine', action='store_true', help="skip stages that need SWI-Prolog")
+    run_parser.add_argument('--output', default='bench_results.json')
+
+    compare_parser = commands.add_parser('compare', help="compare two result files")
+    compare_parser.add_argument('before')
+    compare_parser.add_argument('after')
+
+    args = parser.parse_args()
+    if args.command == 'generate':
+        generate_kb(args.output, args.size, args.seed, args.rules_from)
+        print(f"Wrote {args.output}")
+    elif args.command == 'run':
+        run(args)
+    else:
+        compare(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Live knowledge base deltas
+
+A delta is a JSON object with an "op" understood by
+SimpleTravelAgent.apply_delta. Delta files hold one object per line
+(or a single JSON list):
+
+    {"op": "add", "name": "oslo", "country": "norway", "continent": "europe", "type": "city", "cost": 900, "seasons": ["summer"], "activities": ["museums", "fjord_cruises"]}
+    {"op": "reprice", "name": "paris", "cost": 1150}
+    {"op": "remove", "name": "bali"}
+
+DeltaWatcher polls either a file, applying whole lines appended since the
+last poll, or a directory, applying each new *.json / *.jsonl file once in
+name order. Write directory deltas under another name and rename them into
+place so a half-written file is never picked up.
+
+Changes are applied one at a time: a bad change (unreadable JSON, an
+unknown op, a missing key or a value of the wrong type) is logged and
+skipped without holding up the rest. A file only counts as applied once
+its changes have been, so one that cannot be read is retried next poll.
+"""
+import json
+import os
+import threading
+
+DELTA_SUFFIXES = ('.json', '.jsonl')
+
+
+def parse_delta(text):
+    """Parse delta file contents into a list of change dicts"""
+    text = text.strip()
+    if text.startswith('['):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+class DeltaWatcher:
+    """Background thread feeding delta files to an agent"""
+
+    def __init__(self, agent, path, interval=1.0):
+        self.agent = agent
+        self.path = path
+        self.interval = interval
+        # File mode: bytes already applied; directory mode: files already applied
+        self.offset = 0
+        self.seen = set()
+        self.applied = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="kb-deltas", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                # Keep watching; whatever failed is retried on the next poll
+                print(f"Error applying knowledge base delta: {e}")
+            self._stop.wait(self.interval)
+
+    def poll(self):
+        """Apply whatever is pending once; returns the number of facts changed"""
+        if os.path.isdir(self.path):
+            changed = self._poll_directory()
+        else:
+            changed = self._poll_file()
+        self.applied += changed
+        return changed
+
+    def _poll_file(self):
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+        if size < self.offset:
+            # Truncated or replaced: start over from the top
+            self.offset = 0
+        if size == self.offset:
+            return 0
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(size - self.offset)
+        changed = 0
+        # Whole lines only; a partly written last line waits for the next poll
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b'\n'):
+                break
+            if line.strip():
+                try:
+                    change = json.loads(line)
+                except ValueError as e:
+                    print(f"Skipping bad delta line {line!r}: {e}")
+                else:
+                    changed += self._apply(change)
+            self.offset += len(line)
+        return changed
+
+    def _poll_directory(self):
+        changed = 0
+        for name in sorted(os.listdir(self.path)):
+            if name in self.seen or not name.endswith(DELTA_SUFFIXES):
+                continue
+            with open(os.path.join(self.path, name), encoding='utf-8') as f:
+                text = f.read()
+            try:
+                changes = parse_delta(text)
+            except ValueError as e:
+                print(f"Skipping bad delta file {name}: {e}")
+                changes = []
+            for change in changes:
+                changed += self._apply(change)
+            self.seen.add(name)
+        return changed
+
+    def _apply(self, change):
+        """Apply one change; a bad one is logged and skipped"""
+        try:
+            return self.agent.apply_delta([change])
+        except Exception as e:
+            print(f"Skipping delta {change!r}: {e}")
+            return 0
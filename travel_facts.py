@@ -0,0 +1,346 @@
+"""Pure-Python loader for the ground facts in travel_kb.pl
+
+Only destination/5, best_season/2, activities/2 and budget_level/3 are
+needed on the Python side, so these are read straight from the source
+text without booting SWI-Prolog. Every other clause (rules, directives,
+non-ground facts) is kept verbatim in KnowledgeFacts.other_clauses.
+"""
+import math
+import re
+
+# One-line facts without quotes, strings, nested terms or comments inside
+_SIMPLE_FACT = re.compile(
+    r"^(destination|best_season|activities|budget_level)\(([^()'\"%\n]*)\)\.[ \t\r]*(?:%[^\n]*)?$",
+    re.M
+)
+_SIMPLE_ARG = re.compile(r"\[|\]|[^\s,\[\]]+")
+_INT = re.compile(r"-?\d+")
+_FLOAT = re.compile(r"-?\d+\.\d+(?:[eE][+-]?\d+)?")
+_ATOM = re.compile(r"[a-z][A-Za-z0-9_]*")
+
+_TOKEN = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<comment>%[^\n]*|/\*.*?\*/)
+  | (?P<float>\d+\.\d+(?:[eE][+-]?\d+)?)
+  | (?P<int>\d+)
+  | (?P<qatom>'(?:[^'\\]|\\.|'')*')
+  | (?P<string>"(?:[^"\\]|\\.|"")*")
+  | (?P<var>[A-Z_][A-Za-z0-9_]*)
+  | (?P<atom>[a-z][A-Za-z0-9_]*)
+  | (?P<end>\.(?=\s|%|\Z))
+  | (?P<punct>[()\[\],|])
+  | (?P<symbol>[-+*/\\^<>=~:.?@\#&$]+)
+  | (?P<other>.)
+""", re.X | re.S)
+
+_ESCAPES = {'n': '\n', 't': '\t', '\\': '\\', "'": "'", '"': '"'}
+
+
+# Predicates (functor, arity) kept in KnowledgeFacts
+KEPT_PREDICATES = {('destination', 5), ('best_season', 2), ('activities', 2), ('budget_level', 3)}
+
+DESTINATION_FIELDS = ('name', 'country', 'continent', 'type', 'cost')
+
+# Argument kinds of the kept predicates: atom, number, list of atoms
+_FACT_SHAPES = {'destination': 'aaaan', 'best_season': 'aa', 'activities': 'al', 'budget_level': 'ann'}
+_KIND_NAMES = {'a': "an atom", 'n': "a number", 'l': "a list of atoms"}
+
+
+class KnowledgeFacts:
+    """Ground facts of a travel knowledge base as plain Python structures"""
+
+    def __init__(self):
+        # destination/5 rows by insertion number (so in KB order), and the
+        # numbers under each name so a retract finds its row without a scan
+        self._destinations = {}
+        self._destination_ids = {}
+        self._next_id = 0
+        self.best_seasons = {}
+        # One list per activities/2 fact, as Prolog keeps them, and each
+        # name's activities across all of its facts
+        self.activity_facts = {}
+        self.activities = {}
+        self.budget_levels = []
+        self.other_clauses = []
+
+    @property
+    def destinations(self):
+        """destination/5 facts as dicts in KB order (a new list each time)"""
+        return list(self._destinations.values())
+
+    @destinations.setter
+    def destinations(self, destinations):
+        self._destinations = {}
+        self._destination_ids = {}
+        for dest in destinations:
+            self._add_destination(dest)
+
+    def _add_destination(self, dest):
+        self._destinations[self._next_id] = dest
+        self._destination_ids.setdefault(dest['name'], []).append(self._next_id)
+        self._next_id += 1
+
+    def _find_destination(self, target):
+        for row_id in self._destination_ids.get(target['name'], ()):
+            if self._destinations[row_id] == target:
+                return row_id
+        return None
+
+    @staticmethod
+    def keeps(functor, args):
+        """Whether facts of this predicate are kept here"""
+        return (functor, len(args)) in KEPT_PREDICATES
+
+    def contains(self, functor, args):
+        """Whether retracting this fact would remove something"""
+        if functor == 'destination' and len(args) == 5:
+            return self._find_destination(dict(zip(DESTINATION_FIELDS, args))) is not None
+        if functor == 'best_season' and len(args) == 2:
+            return args[1] in self.best_seasons.get(args[0], ())
+        if functor == 'activities' and len(args) == 2:
+            return list(args[1]) in self.activity_facts.get(args[0], ())
+        if functor == 'budget_level' and len(args) == 3:
+            return tuple(args) in self.budget_levels
+        return False
+
+    def add(self, functor, args):
+        """Record one ground fact; returns False for predicates not kept here"""
+        if functor == 'destination' and len(args) == 5:
+            self._add_destination(dict(zip(DESTINATION_FIELDS, args)))
+        elif functor == 'best_season' and len(args) == 2:
+            self.best_seasons.setdefault(args[0], []).append(args[1])
+        elif functor == 'activities' and len(args) == 2:
+            self.activity_facts.setdefault(args[0], []).append(list(args[1]))
+            self.activities.setdefault(args[0], []).extend(args[1])
+        elif functor == 'budget_level' and len(args) == 3:
+            self.budget_levels.append(tuple(args))
+        else:
+            return False
+        return True
+
+    def remove(self, functor, args):
+        """Drop one ground fact, mirroring retract/1; returns whether it existed"""
+        if functor == 'destination' and len(args) == 5:
+            target = dict(zip(DESTINATION_FIELDS, args))
+            row_id = self._find_destination(target)
+            if row_id is None:
+                return False
+            del self._destinations[row_id]
+            row_ids = self._destination_ids[target['name']]
+            row_ids.remove(row_id)
+            if not row_ids:
+                del self._destination_ids[target['name']]
+            return True
+        elif functor == 'best_season' and len(args) == 2:
+            seasons = self.best_seasons.get(args[0], [])
+            if args[1] in seasons:
+                seasons.remove(args[1])
+                if not seasons:
+                    del self.best_seasons[args[0]]
+                return True
+        elif functor == 'activities' and len(args) == 2:
+            lists = self.activity_facts.get(args[0], [])
+            if list(args[1]) in lists:
+                lists.remove(list(args[1]))
+                if lists:
+                    self.activities[args[0]] = [activity for offered in lists for activity in offered]
+                else:
+                    del self.activity_facts[args[0]]
+                    del self.activities[args[0]]
+                return True
+        elif functor == 'budget_level' and len(args) == 3:
+            if tuple(args) in self.budget_levels:
+                self.budget_levels.remove(tuple(args))
+                return True
+        return False
+
+
+class _Tokens:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return (None, None, -1, -1)
+
+    def take(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+
+def _unquote(text):
+    body = text[1:-1].replace(text[0] * 2, text[0])
+    return re.sub(r"\\(.)", lambda m: _ESCAPES.get(m.group(1), m.group(1)), body)
+
+
+def _parse_term(tokens):
+    """Parse one ground term; raises ValueError for anything else"""
+    kind, text, _, end = tokens.take()
+    if kind == 'int':
+        return int(text)
+    if kind == 'float':
+        return float(text)
+    if kind == 'symbol' and text == '-' and tokens.peek()[0] in ('int', 'float'):
+        return -_parse_term(tokens)
+    if kind == 'string':
+        return _unquote(text)
+    if kind == 'punct' and text == '[':
+        items = []
+        if tokens.peek()[1] == ']':
+            tokens.take()
+            return items
+        while True:
+            items.append(_parse_term(tokens))
+            text = tokens.take()[1]
+            if text == ']':
+                return items
+            if text != ',':
+                raise ValueError("unsupported list syntax")
+    if kind in ('atom', 'qatom'):
+        value = _unquote(text) if kind == 'qatom' else text
+        _, next_text, next_start, _ = tokens.peek()
+        # f(...) is a compound term only when '(' follows the functor directly
+        if next_text == '(' and next_start == end:
+            tokens.take()
+            return (value,) + tuple(_parse_args(tokens))
+        return value
+    raise ValueError(f"not a ground term: {text!r}")
+
+
+def _parse_args(tokens):
+    args = []
+    while True:
+        args.append(_parse_term(tokens))
+        text = tokens.take()[1]
+        if text == ')':
+            return args
+        if text != ',':
+            raise ValueError("unsupported argument syntax")
+
+
+def _parse_clause(tokens):
+    """Return (functor, args) if the clause is a ground fact, else None"""
+    stream = _Tokens(tokens)
+    try:
+        term = _parse_term(stream)
+    except ValueError:
+        return None
+    if stream.peek()[0] is not None or not isinstance(term, tuple):
+        return None
+    return term[0], list(term[1:])
+
+
+def _scan_clauses(text, facts, start, end):
+    """General tokenizer pass over text[start:end]
+
+    Returns the offset of an unterminated trailing clause, or None.
+    """
+    clause = []
+    clause_start = None
+    for match in _TOKEN.finditer(text, start, end):
+        kind = match.lastgroup
+        if kind in ('ws', 'comment'):
+            continue
+        if clause_start is None:
+            clause_start = match.start()
+        if kind == 'end':
+            parsed = _parse_clause(clause)
+            if parsed is None or not facts.add(*parsed):
+                facts.other_clauses.append(text[clause_start:match.end()])
+            clause = []
+            clause_start = None
+        else:
+            clause.append((kind, match.group(), match.start(), match.end()))
+    return clause_start
+
+
+def _simple_args(text):
+    args = []
+    stack = []
+    for token in _SIMPLE_ARG.findall(text):
+        if token == '[':
+            stack.append([])
+            continue
+        if token == ']':
+            value = stack.pop()
+        elif _INT.fullmatch(token):
+            value = int(token)
+        elif _FLOAT.fullmatch(token):
+            value = float(token)
+        elif _ATOM.fullmatch(token):
+            value = token
+        else:
+            raise ValueError(f"not a simple ground argument: {token!r}")
+        (stack[-1] if stack else args).append(value)
+    if stack:
+        raise ValueError("unbalanced list")
+    return args
+
+
+def parse_facts(text):
+    """Parse Prolog source text into KnowledgeFacts"""
+    facts = KnowledgeFacts()
+    position = 0
+    # Block comments may hide fact-shaped lines, so only the general pass is safe
+    if '/*' not in text:
+        for match in _SIMPLE_FACT.finditer(text):
+            pending = _scan_clauses(text, facts, position, match.start())
+            if pending is not None:
+                # The line continues an earlier clause; parse the rest generally
+                position = pending
+                break
+            position = match.end()
+            try:
+                added = facts.add(match.group(1), _simple_args(match.group(2)))
+            except (ValueError, IndexError):
+                added = False
+            if not added:
+                _scan_clauses(text, facts, match.start(), match.end())
+    if _scan_clauses(text, facts, position, len(text)) is not None:
+        raise ValueError("knowledge base ends inside a clause")
+    return facts
+
+
+def load_facts(path):
+    """Read and parse a knowledge base file"""
+    with open(path, encoding='utf-8') as f:
+        return parse_facts(f.read())
+
+
+def _is_atom(value):
+    return isinstance(value, str) and value != ''
+
+
+def _fits(kind, value):
+    if kind == 'a':
+        return _is_atom(value)
+    if kind == 'n':
+        return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+    return isinstance(value, list) and all(_is_atom(item) for item in value)
+
+
+def check_fact(functor, args):
+    """Raise ValueError unless a kept fact has the argument types the indexes rely on"""
+    if not KnowledgeFacts.keeps(functor, args):
+        return
+    for kind, value in zip(_FACT_SHAPES[functor], args):
+        if not _fits(kind, value):
+            raise ValueError(f"{functor}/{len(args)} needs {_KIND_NAMES[kind]}, got {value!r}")
+
+
+def parse_fact(text):
+    """Parse a single ground fact such as destination(oslo, norway, europe, city, 900)"""
+    text = text.strip()
+    if not text.endswith('.'):
+        text += '.'
+    clause = []
+    for match in _TOKEN.finditer(text):
+        if match.lastgroup not in ('ws', 'comment', 'end'):
+            clause.append((match.lastgroup, match.group(), match.start(), match.end()))
+    parsed = _parse_clause(clause)
+    if parsed is None:
+        raise ValueError(f"Not a ground fact: {text}")
+    return parsed
@@ -0,0 +1,358 @@
+import heapq
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+
+
+def intersect_postings(small, large):
+    """Intersect two ascending posting lists, probing the larger one with bisect"""
+    if len(small) > len(large):
+        small, large = large, small
+    result = array('I')
+    lo = 0
+    n = len(large)
+    for row in small:
+        lo = bisect_left(large, row, lo)
+        if lo == n:
+            break
+        if large[lo] == row:
+            result.append(row)
+    return result
+
+
+def _discard(posting, row):
+    """Remove row from an ascending posting list if present"""
+    position = bisect_left(posting, row)
+    if position < len(posting) and posting[position] == row:
+        del posting[position]
+        return True
+    return False
+
+
+class DestinationIndex:
+    """Columnar index over destination/5 facts
+
+    Rows keep knowledge base order. Continent and type are stored as small
+    integer codes with an ascending posting list of row ids per code, and
+    cost_order/sorted_costs give the rows ordered by cost for budget cuts.
+    Each row's dict is built once and handed out by row()/rows() from then
+    on; rows never change (a reprice removes one row and adds another), so
+    callers share these dicts and must not mutate them.
+
+    add() appends a row and remove() tombstones one: its slot in the
+    column lists stays allocated, but it leaves every posting list, so row
+    ids already handed out stay valid. `removed` counts the tombstones so
+    the owner can decide when rebuilding is cheaper.
+    """
+
+    def __init__(self, destinations):
+        self.names = []
+        self.countries = []
+        self.costs = []
+        self.continent_codes = array('H')
+        self.type_codes = array('H')
+        self.continents = []
+        self.types = []
+        self._continent_ids = {}
+        self._type_ids = {}
+        self.by_continent = {}
+        self.by_type = {}
+        self.row_ids = {}
+        self.records = []
+        self.removed = 0
+
+        for dest in destinations:
+            self._append(dest)
+        self.live_rows = array('I', range(len(self.names)))
+
+        # Stable sort keeps KB order between destinations with equal cost
+        self.cost_order = array('I', sorted(range(len(self.costs)), key=self.costs.__getitem__))
+        self.sorted_costs = [self.costs[row] for row in self.cost_order]
+
+    def __len__(self):
+        return len(self.live_rows)
+
+    def _append(self, dest):
+        row = len(self.names)
+        self.row_ids[dest['name']] = row
+        continent = self._code(self._continent_ids, self.continents, dest['continent'])
+        dest_type = self._code(self._type_ids, self.types, dest['type'])
+        self.records.append({field: dest[field] for field in ('name', 'country', 'continent', 'type', 'cost')})
+        self.names.append(dest['name'])
+        self.countries.append(dest['country'])
+        self.costs.append(dest['cost'])
+        self.continent_codes.append(continent)
+        self.type_codes.append(dest_type)
+        self.by_continent.setdefault(continent, array('I')).append(row)
+        self.by_type.setdefault(dest_type, array('I')).append(row)
+        return row
+
+    def add(self, dest):
+        """Append one destination (as assertz/1 would) and return its row id"""
+        row = self._append(dest)
+        self.live_rows.append(row)
+        # The new row has the highest id, so it goes after equal costs
+        position = bisect_right(self.sorted_costs, dest['cost'])
+        self.sorted_costs.insert(position, dest['cost'])
+        self.cost_order.insert(position, row)
+        return row
+
+    def remove(self, row):
+        """Tombstone a row so no query returns it again"""
+        if not _discard(self.live_rows, row):
+            return False
+        if self.row_ids.get(self.names[row]) == row:
+            del self.row_ids[self.names[row]]
+        _discard(self.by_continent[self.continent_codes[row]], row)
+        _discard(self.by_type[self.type_codes[row]], row)
+        position = bisect_left(self.sorted_costs, self.costs[row])
+        while self.cost_order[position] != row:
+            position += 1
+        del self.cost_order[position]
+        del self.sorted_costs[position]
+        self.removed += 1
+        return True
+
+    @staticmethod
+    def _code(ids, values, value):
+        code = ids.get(value)
+        if code is None:
+            code = ids[value] = len(values)
+            values.append(value)
+        return code
+
+    def row(self, row):
+        """One row as the (shared) dict shape used by SimpleTravelAgent"""
+        return self.records[row]
+
+    def rows(self, row_ids):
+        records = self.records
+        return [records[row] for row in row_ids]
+
+    def query(self, continent=None, dest_type=None, max_budget=None, min_budget=None, rows=None):
+        """Return ascending row ids matching every given criterion
+
+        rows is an optional extra posting list (e.g. from ActivityIndex) to intersect with.
+        """
+        postings = []
+        if rows is not None:
+            postings.append(rows)
+        if continent is not None:
+            code = self._continent_ids.get(continent)
+            if code is None:
+                return array('I')
+            postings.append(self.by_continent[code])
+        if dest_type is not None:
+            code = self._type_ids.get(dest_type)
+            if code is None:
+                return array('I')
+            postings.append(self.by_type[code])
+
+        if max_budget is not None or min_budget is not None:
+            lo = 0 if min_budget is None else bisect_left(self.sorted_costs, min_budget)
+            hi = len(self.sorted_costs) if max_budget is None else bisect_right(self.sorted_costs, max_budget)
+            if hi <= lo:
+                return array('I')
+            # Materialize the cost range only when it is the most selective list
+            if not postings or hi - lo < min(len(p) for p in postings):
+                postings.append(array('I', sorted(self.cost_order[lo:hi])))
+                max_budget = min_budget = None
+
+        if not postings:
+            return array('I', self.live_rows)
+
+        postings.sort(key=len)
+        result = array('I', postings[0])
+        for posting in postings[1:]:
+            if not result:
+                break
+            result = intersect_postings(result, posting)
+
+        if max_budget is not None or min_budget is not None:
+            low = float('-inf') if min_budget is None else min_budget
+            high = float('inf') if max_budget is None else max_budget
+            costs = self.costs
+            result = array('I', [row for row in result if low <= costs[row] <= high])
+        return result
+
+
+def bitmap_rows(bitmap):
+    """Ascending positions of the set bits of an int bitmap"""
+    bits = bin(bitmap)[:1:-1]
+    return array('I', [match.start() for match in re.finditer('1', bits)])
+
+
+class ActivityIndex:
+    """Inverted index from activity to ascending DestinationIndex row ids
+
+    Replaces the member/2 scan behind destination_with_activity/2: a lookup
+    is one dict access, and multi-activity AND/OR queries intersect or merge
+    the sorted posting lists. Activities offered by at least 1/32 of the
+    destinations also get an int bitmap (no larger than their posting
+    list), so ANDs of common activities are a few big-int operations.
+    """
+
+    # Below this size, probing the other lists with bisect beats bitmaps
+    PROBE_LIMIT = 256
+
+    def __init__(self, destination_index, activities):
+        self.postings = {}
+        self.bitmaps = {}
+        row_ids = destination_index.row_ids
+        for name, names_activities in activities.items():
+            row = row_ids.get(name)
+            if row is None:
+                continue
+            for activity in set(names_activities):
+                self.postings.setdefault(activity, []).append(row)
+        self.dense_size = max(1, len(destination_index) // 32)
+        for activity, rows in self.postings.items():
+            rows.sort()
+            self.postings[activity] = array('I', rows)
+            if len(rows) >= self.dense_size:
+                self.bitmaps[activity] = self._bitmap(rows)
+
+    def add(self, row, activities):
+        """Index activities offered by one row"""
+        for activity in set(activities):
+            posting = self.postings.setdefault(activity, array('I'))
+            position = bisect_left(posting, row)
+            if position < len(posting) and posting[position] == row:
+                continue
+            posting.insert(position, row)
+            if activity in self.bitmaps:
+                self.bitmaps[activity] |= 1 << row
+            elif len(posting) >= self.dense_size:
+                self.bitmaps[activity] = self._bitmap(posting)
+
+    def remove(self, row, activities):
+        """Drop a row from the posting lists of the given activities"""
+        for activity in set(activities):
+            posting = self.postings.get(activity)
+            if posting is None or not _discard(posting, row):
+                continue
+            if not posting:
+                del self.postings[activity]
+                self.bitmaps.pop(activity, None)
+            elif activity in self.bitmaps:
+                self.bitmaps[activity] &= ~(1 << row)
+
+    @staticmethod
+    def _bitmap(rows):
+        bitmap = 0
+        for row in rows:
+            bitmap |= 1 << row
+        return bitmap
+
+    def activities(self):
+        """All known activities, sorted"""
+        return sorted(self.postings)
+
+    def query(self, activities, match_all=True):
+        """Rows offering all (AND) or any (OR) of the given activities"""
+        postings = [self.postings.get(activity, array('I')) for activity in set(activities)]
+        if not postings:
+            return array('I')
+        if len(postings) == 1:
+            return array('I', postings[0])
+        if match_all:
+            postings.sort(key=len)
+            bitmaps = [self.bitmaps.get(activity) for activity in set(activities)]
+            if len(postings[0]) > self.PROBE_LIMIT and None not in bitmaps:
+                result = bitmaps[0]
+                for bitmap in bitmaps[1:]:
+                    result &= bitmap
+                return bitmap_rows(result)
+            result = postings[0]
+            for posting in postings[1:]:
+                if not result:
+                    break
+                result = intersect_postings(result, posting)
+            return array('I', result)
+        result = array('I')
+        last = None
+        for row in heapq.merge(*postings):
+            if row != last:
+                result.append(row)
+                last = row
+        return result
+
+
+class SimilarityIndex:
+    """Destinations grouped by type, each group sorted by cost
+
+    Answers similar_destinations/3 with a bisect window over the group
+    instead of joining destination/5 with itself, and finds the k closest
+    prices by walking outwards from a destination's position.
+    """
+
+    def __init__(self, destination_index):
+        self.index = destination_index
+        self.groups = {}
+        costs = destination_index.costs
+        for code, rows in destination_index.by_type.items():
+            ordered = sorted(rows, key=costs.__getitem__)
+            self.groups[code] = ([costs[row] for row in ordered], array('I', ordered))
+
+    def add(self, row):
+        """Insert a row added to the destination index"""
+        costs = self.index.costs
+        group_costs, group_rows = self.groups.setdefault(self.index.type_codes[row], ([], array('I')))
+        position = bisect_right(group_costs, costs[row])
+        group_costs.insert(position, costs[row])
+        group_rows.insert(position, row)
+
+    def remove(self, row):
+        """Drop a row before it is tombstoned in the destination index"""
+        group_costs, group_rows, position = self._locate(row)
+        del group_costs[position]
+        del group_rows[position]
+
+    def _locate(self, row):
+        """(group costs, group rows, position of row) for a destination row"""
+        group_costs, group_rows = self.groups[self.index.type_codes[row]]
+        position = bisect_left(group_costs, self.index.costs[row])
+        while group_rows[position] != row:
+            position += 1
+        return group_costs, group_rows, position
+
+    def similar(self, row, max_price_difference):
+        """Rows of the same type within max_price_difference, in KB order"""
+        group_costs, group_rows = self.groups[self.index.type_codes[row]]
+        cost = self.index.costs[row]
+        lo = bisect_left(group_costs, cost - max_price_difference)
+        hi = bisect_right(group_costs, cost + max_price_difference)
+        name = self.index.names[row]
+        names = self.index.names
+        return sorted(other for other in group_rows[lo:hi] if names[other] != name)
+
+    def top_k(self, row, k, max_price_difference=None):
+        """Up to k rows of the same type with the closest cost, closest first"""
+        group_costs, group_rows, position = self._locate(row)
+        cost = group_costs[position]
+        name = self.index.names[row]
+        names = self.index.names
+        limit = float('inf') if max_price_difference is None else max_price_difference
+        left = position - 1
+        right = position + 1
+        size = len(group_rows)
+        result = []
+        while len(result) < k and (left >= 0 or right < size):
+            # Step towards whichever neighbour has the smaller price gap
+            if right >= size or (left >= 0 and cost - group_costs[left] <= group_costs[right] - cost):
+                diff = cost - group_costs[left]
+                other = group_rows[left]
+                left -= 1
+            else:
+                diff = group_costs[right] - cost
+                other = group_rows[right]
+                right += 1
+            if diff > limit:
+                break
+            if names[other] != name:
+                result.append(other)
+        return result
+
+    def top_k_batch(self, rows, k, max_price_difference=None):
+        """top_k for every row of a result set"""
+        return [self.top_k(row, k, max_price_difference) for row in rows]
@@ -1,5 +1,8 @@
 % Travel Agent Knowledge Base
 
+% Facts may be asserted and retracted at runtime by SimpleTravelAgent
+:- dynamic destination/5, best_season/2, activities/2, budget_level/3.
+
 % Facts about destinations
 % destination(destination_name, country, continent, destination_type, cost)
 destination(paris, france, europe, city, 800).
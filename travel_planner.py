@@ -0,0 +1,281 @@
+"""Multi-stop trip planning by branch-and-bound
+
+A plan is a set of distinct destinations for a group that fits the total
+budget (cost per person times people, as calculate_total_cost/3), has
+every stop in season during the travel window and together offers all
+required activities. Plans are scored by the sum of their stops' scores:
+the ranking score (cost fit, value, activity overlap) plus how well the
+stop's seasons cover the window.
+
+Candidates are searched best score first. A branch is cut when:
+
+    score bound   its score plus the best scores still available cannot
+                  beat the k-th best plan found so far
+    budget        the cheapest remaining stops no longer fit the budget
+    activities    the remaining candidates cannot cover the missing activities,
+                  or not with the stops left
+
+The last stop is picked from the candidates offering every activity still
+missing; these lists are built once per set of missing activities.
+
+Branches proven to have no feasible completion are memoized by (position,
+stops left, activities covered) with the largest budget they failed at,
+so any later branch reaching that state with no more budget is cut too.
+The search is anytime: iter_plans() yields each plan that enters the top
+k as it is found and stops when the time budget runs out.
+"""
+import heapq
+import time
+from bisect import bisect_left
+
+from travel_ranking import ALTERNATIVE_SEASON_SCORE, DEFAULT_WEIGHTS, month_number, season_months
+
+# Candidates tried between checks of the time budget
+CLOCK_INTERVAL = 1024
+
+# Infeasible states remembered before the memo stops growing
+MEMO_LIMIT = 500000
+
+
+def window_months(window):
+    """Months (1-12) in a travel window, in travel order
+
+    window is a month or a (first, last) pair of months, wrapping around
+    the new year, or a list of months; None means any time of year.
+    """
+    if window is None:
+        return []
+    if isinstance(window, (str, int)):
+        window = (window, window)
+    if isinstance(window, tuple) and len(window) == 2:
+        first, last = month_number(window[0]), month_number(window[1])
+        if first is None or last is None:
+            raise ValueError(f"Unknown month in travel window: {window}")
+        return [(first - 1 + i) % 12 + 1 for i in range((last - first) % 12 + 1)]
+    months = [month_number(month) for month in window]
+    if None in months:
+        raise ValueError(f"Unknown month in travel window: {window}")
+    return months
+
+
+class TripPlanner:
+    """Finds the best k plans of a fixed number of stops
+
+    season_lookup(dest) returns a destination's season record, activities
+    maps names to their activities and ranker scores single destinations.
+    """
+
+    def __init__(self, destinations, season_lookup, activities, ranker, stops, people=1,
+                 budget=None, window=None, required_activities=None, k=3, time_budget=2.0):
+        if stops < 1:
+            raise ValueError("A trip needs at least one stop")
+        if people < 1:
+            raise ValueError("A trip needs at least one traveller")
+        if k < 1:
+            raise ValueError("Need to keep at least one plan")
+        self.stops = stops
+        self.people = people
+        self.budget = float(budget) if budget else float('inf')
+        self.months = window_months(window)
+        self.required = sorted(set(required_activities or ()))
+        self.k = k
+        self.time_budget = time_budget
+        self.season_lookup = season_lookup
+        self.activities = activities
+        self.stats = {'candidates': 0}
+
+        # Candidates best first; ties keep KB order
+        candidates = []
+        # Season label each candidate is visited in, by name
+        self.season_labels = {}
+        for position, dest in enumerate(destinations):
+            cost = dest['cost'] * people
+            if cost > self.budget:
+                continue
+            season_score, month, label = self.season_fit(dest)
+            if self.months and month is None:
+                continue
+            self.season_labels[dest['name']] = label
+            score = ranker.score(dest) + DEFAULT_WEIGHTS['season'] * season_score
+            candidates.append((-score, position, dest, cost, month))
+        candidates.sort(key=lambda candidate: candidate[:2])
+        self.candidates = [(dest, -negative, cost, month) for negative, _, dest, cost, month in candidates]
+        self.stats['candidates'] = len(self.candidates)
+
+        bits = {activity: 1 << i for i, activity in enumerate(self.required)}
+        self.full_mask = (1 << len(self.required)) - 1
+        self.masks = [
+            sum(bits.get(activity, 0) for activity in set(activities.get(dest['name'], ())))
+            for dest, _, _, _ in self.candidates
+        ]
+
+        # Suffix tables for the bounds: score prefix sums (candidates are
+        # sorted by score, so the next few are the best still available),
+        # cheapest cost from each position, activities still reachable and
+        # the most required activities one remaining stop covers
+        count = len(self.candidates)
+        self.score_prefix = [0.0]
+        for _, score, _, _ in self.candidates:
+            self.score_prefix.append(self.score_prefix[-1] + score)
+        self.min_cost = [float('inf')] * (count + 1)
+        self.reachable = [0] * (count + 1)
+        self.max_cover = [0] * (count + 1)
+        for i in range(count - 1, -1, -1):
+            self.min_cost[i] = min(self.min_cost[i + 1], self.candidates[i][2])
+            self.reachable[i] = self.reachable[i + 1] | self.masks[i]
+            self.max_cover[i] = max(self.max_cover[i + 1], self.masks[i].bit_count())
+        # Positions of the candidates covering a set of missing activities,
+        # built on first use for the last stop of a plan
+        self._covering = {}
+
+    def covering(self, missing):
+        """Ascending candidate positions offering every activity in the missing mask"""
+        positions = self._covering.get(missing)
+        if positions is None:
+            positions = [j for j, mask in enumerate(self.masks) if mask & missing == missing]
+            self._covering[missing] = positions
+        return positions
+
+    def season_fit(self, dest):
+        """(score, first window month in season, matching season label) for one destination"""
+        info = self.season_lookup(dest)
+        if not self.months:
+            return 0.0, None, info['best_season']
+        best = season_months(info['best_season'])
+        for month in self.months:
+            if month in best:
+                return 1.0, month, info['best_season']
+        for label in info['alternative_seasons']:
+            alternative = season_months(label)
+            for month in self.months:
+                if month in alternative:
+                    return ALTERNATIVE_SEASON_SCORE, month, label
+        return 0.0, None, None
+
+    def _plan(self, chosen, score):
+        stops = [self.candidates[i] for i in chosen]
+        if self.months:
+            # Visit the stops in the order their seasons come up in the window
+            order = {month: position for position, month in enumerate(self.months)}
+            stops.sort(key=lambda stop: order[stop[3]])
+        return {
+            'stops': [
+                dict(dest, month=month, total_cost=cost, season=self.season_labels[dest['name']])
+                for dest, _, cost, month in stops
+            ],
+            'total_cost': sum(cost for _, _, cost, _ in stops),
+            'people': self.people,
+            'score': round(score, 4),
+            'activities': sorted({activity for dest, _, _, _ in stops
+                                  for activity in self.activities.get(dest['name'], ())})
+        }
+
+    def iter_plans(self):
+        """Yield each plan as it enters the top k; stops when the time budget runs out"""
+        stats = self.stats
+        stats.update(nodes=0, pruned_score=0, pruned_budget=0, pruned_activities=0, memo_hits=0,
+                     plans_found=0, timed_out=False, seconds=0.0)
+        start = time.monotonic()
+        deadline = start + self.time_budget if self.time_budget else float('inf')
+        candidates, masks = self.candidates, self.masks
+        score_prefix, min_cost, reachable = self.score_prefix, self.min_cost, self.reachable
+        max_cover = self.max_cover
+        full_mask, k, budget = self.full_mask, self.k, self.budget
+        count = len(candidates)
+        # Min-heap of (score, -found order, chosen positions) for the k best plans
+        top = self.top = []
+        dead = {}
+        chosen = []
+
+        steps = 0
+
+        def tick():
+            nonlocal steps
+            steps += 1
+            if steps % CLOCK_INTERVAL == 0 and time.monotonic() > deadline:
+                raise TimeoutError
+
+        def last_stop(i, remaining, covered, score):
+            """Generator over plans completed by one more stop; returns True if none fits"""
+            missing = full_mask & ~covered
+            positions = self.covering(missing) if missing else range(count)
+            infeasible = True
+            for j in positions[bisect_left(positions, i):]:
+                tick()
+                _, stop_score, cost, _ = candidates[j]
+                if len(top) == k and score + stop_score <= top[0][0]:
+                    stats['pruned_score'] += 1
+                    return False
+                if min_cost[j] > remaining:
+                    stats['pruned_budget'] += 1
+                    break
+                if cost > remaining:
+                    continue
+                infeasible = False
+                total = score + stop_score
+                chosen.append(j)
+                stats['plans_found'] += 1
+                entry = (total, -stats['plans_found'], tuple(chosen))
+                if len(top) < k:
+                    heapq.heappush(top, entry)
+                else:
+                    heapq.heapreplace(top, entry)
+                yield self._plan(chosen, total)
+                chosen.pop()
+            return infeasible
+
+        def search(i, slots, spent, covered, score):
+            """Generator over new top-k plans; returns True if no completion is feasible"""
+            stats['nodes'] += 1
+            remaining = budget - spent
+            key = (i, slots, covered)
+            if dead.get(key, -1.0) >= remaining:
+                stats['memo_hits'] += 1
+                return True
+            if slots == 1:
+                infeasible = yield from last_stop(i, remaining, covered, score)
+            else:
+                infeasible = True
+                need = (full_mask & ~covered).bit_count()
+                for j in range(i, count - slots + 1):
+                    tick()
+                    if len(top) == k and score + score_prefix[j + slots] - score_prefix[j] <= top[0][0]:
+                        # Later candidates score no higher, so the rest of the loop goes too
+                        stats['pruned_score'] += 1
+                        infeasible = False
+                        break
+                    if min_cost[j] * slots > remaining:
+                        stats['pruned_budget'] += 1
+                        break
+                    if covered | reachable[j] != full_mask or need > slots * max_cover[j]:
+                        stats['pruned_activities'] += 1
+                        break
+                    _, stop_score, cost, _ = candidates[j]
+                    if cost + min_cost[j + 1] * (slots - 1) > remaining:
+                        stats['pruned_budget'] += 1
+                        continue
+                    next_covered = covered | masks[j]
+                    if (full_mask & ~next_covered).bit_count() > (slots - 1) * max_cover[j + 1]:
+                        stats['pruned_activities'] += 1
+                        continue
+                    chosen.append(j)
+                    if not (yield from search(j + 1, slots - 1, spent + cost, next_covered,
+                                              score + stop_score)):
+                        infeasible = False
+                    chosen.pop()
+            if infeasible and len(dead) < MEMO_LIMIT:
+                dead[key] = remaining
+            return infeasible
+
+        try:
+            yield from search(0, self.stops, 0, 0, 0.0)
+        except TimeoutError:
+            stats['timed_out'] = True
+        finally:
+            stats['seconds'] = round(time.monotonic() - start, 4)
+
+    def best_plans(self):
+        """Run the search to completion or timeout; the k best plans, best first"""
+        for _ in self.iter_plans():
+            pass
+        return [self._plan(chosen, score) for score, _, chosen in sorted(self.top, reverse=True)]
@@ -0,0 +1,173 @@
+"""Weighted ranking of search results
+
+Every candidate gets a score in [0, 1] per criterion, combined with
+configurable weights:
+
+    cost_fit    how well the cost uses the budget (cheapness without one)
+    season      whether the travel month falls in the best or an alternative season
+    activities  share of the requested activities offered
+    value       the card's value rating, 1-5 stars
+
+Only what is shown gets ordered: top_k() keeps a k-sized heap and
+iter_ranked() picks the first page with one too, sorting the rest only
+if more is asked for.
+"""
+import heapq
+import re
+from functools import lru_cache
+
+DEFAULT_WEIGHTS = {'cost_fit': 1.0, 'season': 1.0, 'activities': 1.0, 'value': 0.5}
+
+# Share of the budget a destination ideally costs, leaving some headroom
+BUDGET_TARGET = 0.85
+
+# Cost treated as "expensive" when no budget is given
+COST_SCALE = 2000
+
+# Season score for a month in one of the alternative seasons
+ALTERNATIVE_SEASON_SCORE = 0.5
+
+MONTHS = ['january', 'february', 'march', 'april', 'may', 'june', 'july',
+          'august', 'september', 'october', 'november', 'december']
+
+# sort_by values accepted by Ranker
+SORT_ORDERS = ('relevance', 'price_low', 'price_high', 'value', 'season')
+
+_MONTH_RANGE = re.compile(r"\(([A-Za-z]+)(?:-([A-Za-z]+))?\)")
+
+
+def value_rating(cost):
+    """1-5 star value rating shown on result cards (cheaper is better value)"""
+    return max(1, min(5, 6 - cost // 400))
+
+
+def month_number(month):
+    """1-12 for a month name, abbreviation or number; None if not recognised"""
+    if month is None:
+        return None
+    if isinstance(month, int):
+        return month if 1 <= month <= 12 else None
+    text = str(month).strip().lower()
+    if text.isdigit():
+        return month_number(int(text))
+    for number, name in enumerate(MONTHS, 1):
+        if len(text) >= 3 and name.startswith(text):
+            return number
+    return None
+
+
+@lru_cache(maxsize=None)
+def season_months(label):
+    """Months covered by a label such as 'Dry Season (November-April)'"""
+    match = _MONTH_RANGE.search(label)
+    if match is None:
+        return frozenset()
+    first = month_number(match.group(1))
+    last = month_number(match.group(2) or match.group(1))
+    if first is None or last is None:
+        return frozenset()
+    # Ranges may wrap around the new year
+    return frozenset((first - 1 + i) % 12 + 1 for i in range((last - first) % 12 + 1))
+
+
+class Ranker:
+    """Scores destinations for one search
+
+    season_lookup(dest) returns the destination's season record and
+    activities maps a destination name to its activities.
+    """
+
+    def __init__(self, season_lookup, activities, sort_by='relevance', weights=None,
+                 month=None, max_budget=None, wanted_activities=None):
+        if sort_by not in SORT_ORDERS:
+            raise ValueError(f"Unknown sort order: {sort_by}")
+        self.season_lookup = season_lookup
+        self.activities = activities
+        self.sort_by = sort_by
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        self.month = month_number(month)
+        self.max_budget = float(max_budget) if max_budget else None
+        self.wanted = frozenset(wanted_activities or ())
+        # Costs and season records repeat a lot across candidates
+        self._cost_scores = {}
+        self._season_scores = {}
+
+    def cost_fit(self, cost):
+        if self.max_budget is None:
+            return max(0.0, 1.0 - cost / COST_SCALE)
+        target = BUDGET_TARGET * self.max_budget
+        return max(0.0, 1.0 - abs(cost - target) / self.max_budget)
+
+    def season_match(self, dest):
+        if self.month is None:
+            return 0.0
+        info = self.season_lookup(dest)
+        labels = (info['best_season'], info['alternative_seasons'])
+        score = self._season_scores.get(labels)
+        if score is None:
+            score = 0.0
+            if self.month in season_months(labels[0]):
+                score = 1.0
+            elif any(self.month in season_months(label) for label in labels[1]):
+                score = ALTERNATIVE_SEASON_SCORE
+            self._season_scores[labels] = score
+        return score
+
+    def activity_overlap(self, dest):
+        if not self.wanted:
+            return 0.0
+        offered = self.activities.get(dest['name'], ())
+        return len(self.wanted.intersection(offered)) / len(self.wanted)
+
+    def score(self, dest):
+        """Weighted score of one destination"""
+        weights = self.weights
+        cost = dest['cost']
+        total = self._cost_scores.get(cost)
+        if total is None:
+            total = weights['cost_fit'] * self.cost_fit(cost) + weights['value'] * (value_rating(cost) - 1) / 4
+            self._cost_scores[cost] = total
+        if self.month is not None:
+            total += weights['season'] * self.season_match(dest)
+        if self.wanted:
+            total += weights['activities'] * self.activity_overlap(dest)
+        return total
+
+    def key(self, dest):
+        """Sort key, larger first"""
+        sort_by = self.sort_by
+        if sort_by == 'price_low':
+            return (-dest['cost'], self.score(dest))
+        if sort_by == 'price_high':
+            return (dest['cost'], self.score(dest))
+        if sort_by == 'value':
+            return (value_rating(dest['cost']), -dest['cost'], self.score(dest))
+        if sort_by == 'season':
+            return (self.season_match(dest), self.score(dest))
+        return (self.score(dest),)
+
+    def top_k(self, destinations, k):
+        """The k best destinations, best first; ties keep their input order"""
+        return heapq.nlargest(k, destinations, key=self.key)
+
+    def iter_ranked(self, destinations, first=200):
+        """Every destination lazily in rank order; ties keep their input order
+
+        Each destination is scored once. The first `first` results come
+        from a heap of that size, so showing the first page of a large
+        result set never sorts it; the rest are sorted only when the
+        caller reads past them.
+        """
+        if not isinstance(destinations, list):
+            destinations = list(destinations)
+        keys = [self.key(dest) for dest in destinations]
+        positions = range(len(destinations))
+        head = heapq.nlargest(first, positions, key=keys.__getitem__)
+        for i in head:
+            yield destinations[i]
+        if len(head) == len(destinations):
+            return
+        shown = set(head)
+        rest = sorted((i for i in positions if i not in shown), key=keys.__getitem__, reverse=True)
+        for i in rest:
+            yield destinations[i]
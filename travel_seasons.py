@@ -0,0 +1,162 @@
+from types import MappingProxyType
+
+# Season logic based on destination type and continent
+SEASONS = {
+    'beach': {
+        'europe': ['Summer (June-August)', 'Late Spring (May)', 'Early Autumn (September)'],
+        'asia': ['Dry Season (November-April)', 'Summer (June-August)'],
+        'north_america': ['Summer (June-August)', 'Late Spring (May)', 'Early Fall (September)'],
+        'south_america': ['Summer (December-March)', 'Dry Season (May-October)'],
+        'africa': ['Dry Season (June-October)', 'Summer (December-February)'],
+        'australia': ['Summer (December-February)', 'Spring (September-November)']
+    },
+    'mountain': {
+        'europe': ['Summer (June-September)', 'Spring (April-June)', 'Autumn (September-October)'],
+        'asia': ['Spring (March-May)', 'Autumn (September-November)'],
+        'north_america': ['Summer (June-September)', 'Fall (September-October)'],
+        'south_america': ['Dry Season (May-September)', 'Summer (December-February)'],
+        'africa': ['Dry Season (June-October)', 'Winter (December-February)'],
+        'australia': ['Summer (December-February)', 'Autumn (March-May)']
+    },
+    'city': {
+        'europe': ['Spring (April-June)', 'Autumn (September-October)', 'Summer (June-August)'],
+        'asia': ['Winter (November-February)', 'Spring (March-May)'],
+        'north_america': ['Spring (April-June)', 'Fall (September-October)'],
+        'south_america': ['Spring (September-November)', 'Autumn (March-May)'],
+        'africa': ['Dry Season (June-October)', 'Winter (December-February)'],
+        'australia': ['Spring (September-November)', 'Autumn (March-May)']
+    },
+    'historical': {
+        'europe': ['Spring (April-June)', 'Autumn (September-October)'],
+        'asia': ['Winter (November-February)', 'Spring (March-May)'],
+        'north_america': ['Spring (April-June)', 'Fall (September-October)'],
+        'south_america': ['Dry Season (May-September)', 'Spring (September-November)'],
+        'africa': ['Dry Season (June-October)', 'Winter (December-February)'],
+        'australia': ['Autumn (March-May)', 'Spring (September-November)']
+    },
+    'adventure': {
+        'europe': ['Summer (June-September)', 'Spring (April-June)'],
+        'asia': ['Dry Season (November-April)', 'Spring (March-May)'],
+        'north_america': ['Summer (June-September)', 'Spring (April-June)'],
+        'south_america': ['Dry Season (May-September)', 'Summer (December-February)'],
+        'africa': ['Dry Season (June-October)', 'Winter (December-February)'],
+        'australia': ['Spring (September-November)', 'Autumn (March-May)']
+    }
+}
+
+DEFAULT_SEASONS = ['Spring (March-May)', 'Autumn (September-November)']
+
+REASONS = {
+    'beach': "Perfect weather for beach activities with warm temperatures and minimal rainfall",
+    'mountain': "Ideal conditions for hiking and mountain activities with clear skies and comfortable temperatures",
+    'city': "Pleasant weather for city exploration with mild temperatures and fewer crowds",
+    'historical': "Best time for sightseeing with comfortable weather and good visibility",
+    'adventure': "Optimal conditions for adventure activities with stable weather and accessible terrain"
+}
+
+DEFAULT_REASON = "Favorable weather conditions and optimal travel experience"
+
+# Continent-specific notes appended to the reason
+CONTINENT_NOTES = {
+    'europe': " during this popular travel period",
+    'asia': " with comfortable humidity levels",
+    'north_america': " with excellent travel conditions",
+    'south_america': " during the dry season",
+    'africa': " with minimal rainfall",
+    'australia': " with perfect outdoor conditions"
+}
+
+# Labels for best_season/2 atoms that have no match in SEASONS
+SOUTHERN_CONTINENTS = frozenset(['south_america', 'australia', 'oceania'])
+
+NORTHERN_SEASON_LABELS = {
+    'spring': 'Spring (March-May)',
+    'summer': 'Summer (June-August)',
+    'autumn': 'Autumn (September-November)',
+    'winter': 'Winter (December-February)'
+}
+
+SOUTHERN_SEASON_LABELS = {
+    'spring': 'Spring (September-November)',
+    'summer': 'Summer (December-February)',
+    'autumn': 'Autumn (March-May)',
+    'winter': 'Winter (June-August)'
+}
+
+# Words used in SEASONS labels for each best_season/2 atom
+SEASON_WORDS = {
+    'spring': ('spring', 'late spring'),
+    'summer': ('summer',),
+    'autumn': ('autumn', 'fall', 'early autumn', 'early fall'),
+    'winter': ('winter',),
+    'dry_season': ('dry season',)
+}
+
+
+def season_info(best_season, alternative_seasons, reason):
+    """Read-only season record in the shape returned by get_best_season"""
+    return MappingProxyType({
+        'best_season': best_season,
+        'alternative_seasons': tuple(alternative_seasons),
+        'reason': reason
+    })
+
+
+def season_reason(dest_type, continent):
+    """Generate reason why the recommended season is best"""
+    return REASONS.get(dest_type, DEFAULT_REASON) + CONTINENT_NOTES.get(continent, "")
+
+
+def _compile_table():
+    table = {}
+    for dest_type, by_continent in SEASONS.items():
+        for continent, seasons in by_continent.items():
+            table[(dest_type, continent)] = season_info(
+                seasons[0], seasons[1:], season_reason(dest_type, continent)
+            )
+    return MappingProxyType(table)
+
+
+SEASON_TABLE = _compile_table()
+
+
+def season_entry(dest_type, continent):
+    """Season record for a (type, continent) pair, falling back to the defaults"""
+    entry = SEASON_TABLE.get((dest_type, continent))
+    if entry is None:
+        entry = season_info(DEFAULT_SEASONS[0], DEFAULT_SEASONS[1:], season_reason(dest_type, continent))
+    return entry
+
+
+def season_label(season, dest_type, continent):
+    """Turn a best_season/2 atom into a display label for this destination"""
+    words = SEASON_WORDS.get(season, (season.replace('_', ' '),))
+    # Prefer the month range already used for this type and continent
+    for label in SEASONS.get(dest_type, {}).get(continent, ()):
+        if label.split(' (')[0].lower() in words:
+            return label
+    if continent in SOUTHERN_CONTINENTS:
+        labels = SOUTHERN_SEASON_LABELS
+    else:
+        labels = NORTHERN_SEASON_LABELS
+    return labels.get(season, season.replace('_', ' ').title())
+
+
+def compile_destination_seasons(destinations, kb_seasons):
+    """Resolve every destination's season record ahead of render time
+
+    kb_seasons maps a destination name to its best_season/2 atoms in KB
+    order. Destinations with such facts get them as their best and
+    alternative seasons; the rest share the (type, continent) record.
+    """
+    resolved = {}
+    for dest in destinations:
+        dest_type = dest['type']
+        continent = dest['continent']
+        entry = season_entry(dest_type, continent)
+        seasons = kb_seasons.get(dest['name'])
+        if seasons:
+            labels = list(dict.fromkeys(season_label(season, dest_type, continent) for season in seasons))
+            entry = season_info(labels[0], labels[1:], entry['reason'])
+        resolved[dest['name']] = entry
+    return resolved
@@ -0,0 +1,223 @@
+"""Headless HTTP/JSON recommendation service
+
+    python travel_server.py serve --port 8080 --workers 4
+    python travel_server.py load --url http://127.0.0.1:8080 --requests 5000 --concurrency 32
+
+pyswip engines cannot be shared between threads, so every worker process
+consults its own SimpleTravelAgent and HTTP threads hand requests to the
+process pool's task queue.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.error import HTTPError, URLError
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+from urllib.request import urlopen
+
+from travel_workers import init_worker, percentile, worker_agent
+
+
+def handle_request(endpoint, name, params):
+    """Run one request against this worker's agent, returning (status, payload)"""
+    agent = worker_agent()
+    if endpoint == 'search':
+        budget = params.get('budget')
+        results = agent.recommend_destinations(
+            params.get('continent'), params.get('type'), float(budget) if budget else None
+        )
+        # count is every match, as in travel_batch; limit only trims the list
+        count = len(results)
+        limit = params.get('limit')
+        if limit:
+            results = results[:int(limit)]
+        return 200, {'count': count, 'results': results}
+
+    details = agent.get_destination_details(name)
+    if details is None:
+        return 404, {'error': f"Unknown destination: {name}"}
+    if endpoint == 'details':
+        return 200, details
+    if endpoint == 'seasons':
+        return 200, dict(agent.get_best_season(name, details['type'], details['continent']))
+    if endpoint == 'activities':
+        return 200, {'name': name, 'activities': agent.get_activities(name)}
+    if endpoint == 'similar':
+        max_diff = float(params.get('max_diff', 200))
+        return 200, {'name': name, 'similar': agent.similar_destinations(name, max_diff)}
+    return 404, {'error': f"Unknown endpoint: {endpoint}"}
+
+
+def route(path):
+    """Map a URL path to (endpoint, destination name)"""
+    parts = [unquote(part) for part in path.strip('/').split('/') if part]
+    if parts == ['search']:
+        return 'search', None
+    if parts == ['health']:
+        return 'health', None
+    if len(parts) == 2 and parts[0] == 'destinations':
+        return 'details', parts[1]
+    if len(parts) == 3 and parts[0] == 'destinations':
+        return parts[2], parts[1]
+    return None, None
+
+
+class RecommendationHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlsplit(self.path)
+        endpoint, name = route(url.path)
+        if endpoint is None:
+            self.send_json(404, {'error': f"Unknown path: {url.path}"})
+            return
+        if endpoint == 'health':
+            self.send_json(200, {'status': 'ok', 'workers': self.server.workers})
+            return
+
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        # Refuse work instead of letting the queue grow without bound
+        if not self.server.slots.acquire(blocking=False):
+            self.send_json(503, {'error': "Server busy, try again"})
+            return
+        try:
+            result = self.server.pool.apply_async(handle_request, (endpoint, name, params))
+            status, payload = result.get(self.server.request_timeout)
+        except multiprocessing.TimeoutError:
+            status, payload = 504, {'error': "Request timed out"}
+        except (TypeError, ValueError) as e:
+            status, payload = 400, {'error': str(e)}
+        except Exception as e:
+            status, payload = 500, {'error': str(e)}
+        finally:
+            self.server.slots.release()
+        self.send_json(status, payload)
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class RecommendationServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, kb_path="travel_kb.pl", workers=None, max_pending=256,
+                 request_timeout=30.0, verbose=False, fast_path=False):
+        super().__init__(address, RecommendationHandler)
+        self.workers = workers or os.cpu_count() or 1
+        # spawn gives every worker a fresh interpreter and its own Prolog engine
+        context = multiprocessing.get_context('spawn')
+        self.pool = context.Pool(self.workers, initializer=init_worker,
+                                 initargs=(kb_path, fast_path))
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.request_timeout = request_timeout
+        self.verbose = verbose
+
+    def server_close(self):
+        super().server_close()
+        self.pool.terminate()
+        self.pool.join()
+
+
+def serve(args):
+    server = RecommendationServer((args.host, args.port), args.kb, args.workers,
+                                  args.max_pending, args.timeout, args.verbose, args.fast_path)
+    print(f"Serving {args.kb} on http://{args.host}:{args.port} with {server.workers} worker(s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def load_test(args):
+    """Fire a mix of requests at a running server and report throughput"""
+    base = args.url.rstrip('/')
+    with urlopen(f"{base}/search") as response:
+        names = [dest['name'] for dest in json.load(response)['results']]
+    continents = ['europe', 'asia', 'north_america', 'south_america', 'africa', 'australia']
+    types = ['beach', 'mountain', 'city', 'historical', 'adventure']
+
+    def make_url(rng):
+        kind = rng.random()
+        if kind < 0.6 or not names:
+            query = f"continent={rng.choice(continents)}&type={rng.choice(types)}&budget={rng.randrange(500, 2000, 100)}"
+            return f"{base}/search?{query}"
+        name = quote(rng.choice(names))
+        suffix = rng.choice(['', '/seasons', '/activities', '/similar?max_diff=200'])
+        return f"{base}/destinations/{name}{suffix}"
+
+    def fetch(seed):
+        url = make_url(random.Random(seed))
+        start = time.perf_counter()
+        try:
+            with urlopen(url, timeout=args.timeout) as response:
+                response.read()
+                status = response.status
+        except HTTPError as e:
+            status = e.code
+        except (URLError, OSError):
+            # Refused or reset connections and timeouts count as errors
+            status = None
+        return status, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        outcomes = list(executor.map(fetch, range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for _, latency in outcomes)
+    errors = sum(1 for status, _ in outcomes if status is None or status >= 500)
+    report = {
+        'requests': args.requests,
+        'concurrency': args.concurrency,
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'throughput_rps': round(args.requests / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2)
+    }
+    print(json.dumps(report, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TravelExplorer recommendation service")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = commands.add_parser('serve', help="run the HTTP/JSON server")
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8080)
+    serve_parser.add_argument('--kb', default='travel_kb.pl')
+    serve_parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    serve_parser.add_argument('--max-pending', type=int, default=256, help="requests queued before answering 503")
+    serve_parser.add_argument('--timeout', type=float, default=30.0)
+    serve_parser.add_argument('--verbose', action='store_true')
+    serve_parser.add_argument('--fast-path', action='store_true',
+                              help="load ground facts in Python and start Prolog only when needed")
+    serve_parser.set_defaults(func=serve)
+
+    load_parser = commands.add_parser('load', help="run a local load test against a server")
+    load_parser.add_argument('--url', default='http://127.0.0.1:8080')
+    load_parser.add_argument('--requests', type=int, default=2000)
+    load_parser.add_argument('--concurrency', type=int, default=16)
+    load_parser.add_argument('--timeout', type=float, default=30.0, help="seconds before a request counts as failed")
+    load_parser.set_defaults(func=load_test)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
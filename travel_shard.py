@@ -0,0 +1,544 @@
+"""Sharded knowledge base with scatter-gather search
+
+    python travel_shard.py partition travel_kb.pl --shards 4 --by continent --out shards
+    python travel_shard.py node shards/shard_0.pl --port 9100
+    python travel_shard.py search --manifest shards/shards.json --nodes 127.0.0.1:9100,... --continent asia
+    python travel_shard.py local travel_kb.pl --shards 4 --by hash --queries 2000
+
+partition splits the destinations of a knowledge base by continent or by
+a stable hash of the name into one .pl file per shard. Every shard keeps
+the rules, directives and budget levels; seasons and activities follow
+their destination. shards.json records the scheme and, for continent
+sharding, which shard owns which continent.
+
+Each node runs its own SimpleTravelAgent behind a JSON-lines socket. The
+coordinator sends a query to every shard, or only to the owning shard when
+a continent-sharded query filters on one continent, and merges the ranked
+partial results. Per-shard round-trip latencies are kept for stats().
+"""
+import argparse
+import heapq
+import json
+import multiprocessing
+import os
+import queue
+import random
+import socket
+import socketserver
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from travel_agent_tkinter import SimpleTravelAgent, prolog_term
+from travel_facts import load_facts
+from travel_workers import percentile
+
+MANIFEST_NAME = "shards.json"
+
+# Partitioning schemes accepted by partition_kb
+SCHEMES = ('continent', 'hash')
+
+# Round-trip latencies kept per shard for stats()
+LATENCY_WINDOW = 10000
+
+
+def shard_for_name(name, shards):
+    """Shard owning a destination under hash partitioning (stable across runs)"""
+    return zlib.crc32(str(name).encode('utf-8')) % shards
+
+
+def assign_continents(destinations, shards):
+    """Map each continent to a shard, largest continents first onto the emptiest shard"""
+    sizes = {}
+    for dest in destinations:
+        sizes[dest['continent']] = sizes.get(dest['continent'], 0) + 1
+    loads = [(0, shard) for shard in range(shards)]
+    owners = {}
+    for continent in sorted(sizes, key=lambda continent: (-sizes[continent], continent)):
+        load, shard = heapq.heappop(loads)
+        owners[continent] = shard
+        heapq.heappush(loads, (load + sizes[continent], shard))
+    return owners
+
+
+def _fact_line(functor, args):
+    return f"{functor}({', '.join(prolog_term(arg) for arg in args)}).\n"
+
+
+def partition_kb(kb_path, out_dir, shards, by='continent'):
+    """Write one knowledge base per shard plus shards.json; returns the manifest"""
+    if by not in SCHEMES:
+        raise ValueError(f"Unknown partitioning: {by}")
+    if shards < 1:
+        raise ValueError("Need at least one shard")
+    facts = load_facts(kb_path)
+    owners = assign_continents(facts.destinations, shards) if by == 'continent' else {}
+
+    def owner(dest):
+        if by == 'continent':
+            return owners[dest['continent']]
+        return shard_for_name(dest['name'], shards)
+
+    os.makedirs(out_dir, exist_ok=True)
+    directives = [clause for clause in facts.other_clauses if clause.startswith(':-')]
+    rules = [clause for clause in facts.other_clauses if not clause.startswith(':-')]
+    buckets = [[] for _ in range(shards)]
+    for dest in facts.destinations:
+        buckets[owner(dest)].append(dest)
+
+    manifest = {'source': os.path.abspath(kb_path), 'by': by, 'shards': []}
+    for shard, destinations in enumerate(buckets):
+        path = os.path.join(out_dir, f"shard_{shard}.pl")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"% Shard {shard} of {shards} ({by}) from {os.path.basename(kb_path)}\n\n")
+            for directive in directives:
+                f.write(directive + "\n")
+            f.write("\n")
+            for dest in destinations:
+                f.write(_fact_line('destination', [dest['name'], dest['country'], dest['continent'],
+                                                   dest['type'], dest['cost']]))
+            for dest in destinations:
+                for season in facts.best_seasons.get(dest['name'], []):
+                    f.write(_fact_line('best_season', [dest['name'], season]))
+            for dest in destinations:
+                for offered in facts.activity_facts.get(dest['name'], []):
+                    f.write(_fact_line('activities', [dest['name'], offered]))
+            for level in facts.budget_levels:
+                f.write(_fact_line('budget_level', list(level)))
+            f.write("\n")
+            for rule in rules:
+                f.write(rule + "\n\n")
+        manifest['shards'].append({
+            'path': os.path.abspath(path),
+            'destinations': len(destinations),
+            'continents': sorted(continent for continent, owned in owners.items() if owned == shard)
+        })
+
+    with open(os.path.join(out_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_manifest(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+# --- Shard nodes -----------------------------------------------------------
+
+def handle_shard_request(agent, request):
+    """Answer one coordinator request from this shard's agent"""
+    op = request.get('op')
+    if op == 'search':
+        results = agent.recommend_destinations(request.get('continent'), request.get('type'),
+                                               request.get('max_budget'), request.get('activities'),
+                                               request.get('match_all', True))
+        count = len(results)
+        limit = request.get('limit')
+        ranking = request.get('ranking')
+        keys = None
+        if ranking is not None:
+            ranker = agent.ranker(**ranking)
+            if limit is not None:
+                results = ranker.top_k(results, limit)
+            else:
+                results = list(ranker.iter_ranked(results))
+            keys = [ranker.key(dest) for dest in results]
+        elif limit is not None:
+            results = results[:limit]
+        return {'count': count, 'results': results, 'keys': keys}
+    if op == 'details':
+        return {'details': agent.get_destination_details(request['name'])}
+    if op == 'count':
+        return {'count': agent.count_destinations(request.get('continent'), request.get('type'),
+                                                  request.get('max_budget'), request.get('min_budget'))}
+    if op == 'ping':
+        return {'destinations': len(agent.index), 'kb_version': agent.kb_version}
+    raise ValueError(f"Unknown shard op: {op}")
+
+
+class ShardRequestHandler(socketserver.StreamRequestHandler):
+    """One JSON request per line, one JSON response per line, until EOF"""
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            start = time.perf_counter()
+            try:
+                response = handle_shard_request(self.server.agent, json.loads(line))
+                response['ok'] = True
+            except (KeyError, TypeError, ValueError) as e:
+                response = {'ok': False, 'error': str(e)}
+            response['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 3)
+            self.wfile.write(json.dumps(response).encode('utf-8') + b"\n")
+            self.wfile.flush()
+
+
+class ShardServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, kb_path, fast_path=True):
+        self.agent = SimpleTravelAgent(kb_path, fast_path=fast_path)
+        super().__init__(address, ShardRequestHandler)
+
+
+def run_node(kb_path, host='127.0.0.1', port=0, fast_path=True, ready=None):
+    """Serve one shard until interrupted; ready (a pipe end) receives the bound port"""
+    server = ShardServer((host, port), kb_path, fast_path)
+    if ready is not None:
+        ready.send(server.server_address[1])
+        ready.close()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+# --- Coordinator -----------------------------------------------------------
+
+class ShardClient:
+    """Pooled JSON-lines connections to one shard node, with latency stats"""
+
+    def __init__(self, address, timeout=30.0):
+        self.address = address
+        self.timeout = timeout
+        self._connections = queue.LifoQueue()
+        self._stats_lock = threading.Lock()
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.shard_latencies = deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.errors = 0
+
+    def _connect(self):
+        sock = socket.create_connection(self.address, self.timeout)
+        return sock, sock.makefile('rb')
+
+    def call(self, request):
+        """Send one request and wait for its response"""
+        try:
+            connection = self._connections.get_nowait()
+        except queue.Empty:
+            connection = self._connect()
+        sock, reader = connection
+        start = time.perf_counter()
+        try:
+            sock.sendall(json.dumps(request).encode('utf-8') + b"\n")
+            line = reader.readline()
+            if not line:
+                raise ConnectionError(f"Shard {self.address[0]}:{self.address[1]} closed the connection")
+            response = json.loads(line)
+        except (OSError, ValueError):
+            reader.close()
+            sock.close()
+            with self._stats_lock:
+                self.requests += 1
+                self.errors += 1
+            raise
+        elapsed = time.perf_counter() - start
+        self._connections.put(connection)
+        with self._stats_lock:
+            self.requests += 1
+            self.latencies.append(elapsed)
+            self.shard_latencies.append(response.get('elapsed_ms', 0.0) / 1000)
+            if not response.get('ok'):
+                self.errors += 1
+        if not response.get('ok'):
+            raise ValueError(response.get('error', "Shard request failed"))
+        return response
+
+    def stats(self):
+        with self._stats_lock:
+            latencies = sorted(self.latencies)
+            shard_latencies = sorted(self.shard_latencies)
+            requests, errors = self.requests, self.errors
+        return {
+            'address': f"{self.address[0]}:{self.address[1]}",
+            'requests': requests,
+            'errors': errors,
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+            'max_ms': round(latencies[-1] * 1000, 3) if latencies else 0.0,
+            # Time spent inside the shard, the rest is transport and queueing
+            'shard_p50_ms': round(percentile(shard_latencies, 0.50) * 1000, 3)
+        }
+
+    def close(self):
+        while True:
+            try:
+                sock, reader = self._connections.get_nowait()
+            except queue.Empty:
+                return
+            reader.close()
+            sock.close()
+
+
+class ShardCoordinator:
+    """Scatters queries over shard nodes and merges their partial results
+
+    addresses are (host, port) pairs in manifest shard order.
+    """
+
+    def __init__(self, manifest, addresses, timeout=30.0):
+        if len(addresses) != len(manifest['shards']):
+            raise ValueError(f"Manifest has {len(manifest['shards'])} shards, got {len(addresses)} nodes")
+        self.by = manifest['by']
+        self.clients = [ShardClient(tuple(address), timeout) for address in addresses]
+        self.continent_owner = {
+            continent: shard
+            for shard, entry in enumerate(manifest['shards'])
+            for continent in entry.get('continents', [])
+        }
+        self._pool = ThreadPoolExecutor(max_workers=len(self.clients), thread_name_prefix="scatter")
+
+    def shards_for(self, continent=None):
+        """Shards that can hold matches for a query on continent"""
+        if continent and continent != "Any" and self.by == 'continent':
+            shard = self.continent_owner.get(continent)
+            # Continents added after partitioning may live anywhere
+            if shard is not None:
+                return [shard]
+        return list(range(len(self.clients)))
+
+    def _scatter(self, shards, request):
+        if len(shards) == 1:
+            return [self.clients[shards[0]].call(request)]
+        futures = [self._pool.submit(self.clients[shard].call, request) for shard in shards]
+        return [future.result() for future in futures]
+
+    def recommend_destinations(self, continent=None, dest_type=None, max_budget=None,
+                               activities=None, match_all=True, limit=None, **ranking):
+        """Matching destinations from every relevant shard
+
+        With ranking arguments (sort_by, weights, month, max_budget,
+        activities as for SimpleTravelAgent.ranker) each shard returns its
+        own top results and the coordinator merges them by score; without,
+        results come shard by shard. Returns (total matches, results).
+        """
+        request = {
+            'op': 'search',
+            'continent': continent,
+            'type': dest_type,
+            'max_budget': float(max_budget) if max_budget else None,
+            'activities': list(activities) if activities else None,
+            'match_all': match_all,
+            'limit': limit
+        }
+        if ranking:
+            ranking.setdefault('max_budget', request['max_budget'])
+            ranking.setdefault('activities', request['activities'])
+            request['ranking'] = ranking
+        responses = self._scatter(self.shards_for(continent), request)
+        total = sum(response['count'] for response in responses)
+
+        if not ranking:
+            results = [dest for response in responses for dest in response['results']]
+            return total, results if limit is None else results[:limit]
+
+        # Ties keep shard order, then each shard's own rank order
+        candidates = (
+            (tuple(key), -shard, -position, dest)
+            for shard, response in enumerate(responses)
+            for position, (key, dest) in enumerate(zip(response['keys'], response['results']))
+        )
+        if limit is None:
+            ranked = sorted(candidates, key=lambda item: item[:3], reverse=True)
+        else:
+            ranked = heapq.nlargest(limit, candidates, key=lambda item: item[:3])
+        return total, [item[3] for item in ranked]
+
+    def count_destinations(self, continent=None, dest_type=None, max_budget=None, min_budget=None):
+        request = {'op': 'count', 'continent': continent, 'type': dest_type,
+                   'max_budget': max_budget, 'min_budget': min_budget}
+        return sum(response['count'] for response in self._scatter(self.shards_for(continent), request))
+
+    def get_destination_details(self, destination_name):
+        """One destination's details from whichever shard holds it, or None"""
+        request = {'op': 'details', 'name': destination_name}
+        if self.by == 'hash':
+            shards = [shard_for_name(destination_name, len(self.clients))]
+        else:
+            shards = list(range(len(self.clients)))
+        for response in self._scatter(shards, request):
+            if response['details'] is not None:
+                return response['details']
+        return None
+
+    def stats(self):
+        """Per-shard request counts and round-trip latency percentiles"""
+        return [dict(client.stats(), shard=shard) for shard, client in enumerate(self.clients)]
+
+    def close(self):
+        self._pool.shutdown()
+        for client in self.clients:
+            client.close()
+
+
+class LocalCluster:
+    """Shard nodes as local processes on loopback ports, with a coordinator
+
+    with LocalCluster("travel_kb.pl", shards=4, by='hash') as cluster:
+        total, results = cluster.coordinator.recommend_destinations(continent='asia')
+    """
+
+    def __init__(self, kb_path, shards=4, by='continent', work_dir=None, fast_path=True,
+                 start_timeout=60.0):
+        self.work_dir = work_dir or os.path.join(os.path.dirname(os.path.abspath(kb_path)), 'shards')
+        self.manifest = partition_kb(kb_path, self.work_dir, shards, by)
+        context = multiprocessing.get_context('spawn')
+        self.processes = []
+        addresses = []
+        try:
+            pipes = []
+            for entry in self.manifest['shards']:
+                receiver, sender = context.Pipe(duplex=False)
+                process = context.Process(target=run_node, args=(entry['path'], '127.0.0.1', 0, fast_path, sender),
+                                          daemon=True)
+                process.start()
+                sender.close()
+                self.processes.append(process)
+                pipes.append(receiver)
+            for receiver in pipes:
+                if not receiver.poll(start_timeout):
+                    raise RuntimeError("Shard node did not start in time")
+                try:
+                    addresses.append(('127.0.0.1', receiver.recv()))
+                except EOFError:
+                    raise RuntimeError("Shard node exited during startup") from None
+                receiver.close()
+        except Exception:
+            self.stop_nodes()
+            raise
+        self.coordinator = ShardCoordinator(self.manifest, addresses)
+
+    def stop_nodes(self):
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            process.join()
+
+    def close(self):
+        self.coordinator.close()
+        self.stop_nodes()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# --- Command line ----------------------------------------------------------
+
+def _addresses(text):
+    addresses = []
+    for item in text.split(','):
+        host, _, port = item.strip().rpartition(':')
+        addresses.append((host or '127.0.0.1', int(port)))
+    return addresses
+
+
+def _search_kwargs(args):
+    kwargs = {'continent': args.continent, 'dest_type': args.type, 'max_budget': args.budget,
+              'limit': args.limit}
+    if args.sort_by:
+        kwargs.update(sort_by=args.sort_by, month=args.month)
+    return kwargs
+
+
+def partition_command(args):
+    manifest = partition_kb(args.kb, args.out, args.shards, args.by)
+    for shard, entry in enumerate(manifest['shards']):
+        owned = f" ({', '.join(entry['continents'])})" if entry['continents'] else ""
+        print(f"shard {shard}: {entry['destinations']} destinations{owned} -> {entry['path']}")
+
+
+def node_command(args):
+    print(f"Serving shard {args.kb} on {args.host}:{args.port}")
+    run_node(args.kb, args.host, args.port, not args.engine)
+
+
+def search_command(args):
+    coordinator = ShardCoordinator(load_manifest(args.manifest), _addresses(args.nodes))
+    try:
+        total, results = coordinator.recommend_destinations(**_search_kwargs(args))
+        print(json.dumps({'count': total, 'results': results, 'shards': coordinator.stats()}, indent=2))
+    finally:
+        coordinator.close()
+
+
+def local_command(args):
+    """Start a loopback cluster, run a random query mix and print per-shard latency"""
+    continents = ['europe', 'asia', 'north_america', 'south_america', 'africa', 'australia', 'oceania']
+    types = ['beach', 'mountain', 'city', 'historical', 'adventure']
+    rng = random.Random(args.seed)
+    with LocalCluster(args.kb, args.shards, args.by, args.out, not args.engine) as cluster:
+        coordinator = cluster.coordinator
+        start = time.perf_counter()
+        for _ in range(args.queries):
+            coordinator.recommend_destinations(
+                rng.choice(continents + [None]), rng.choice(types + [None]),
+                rng.choice([None, 700, 1000, 1500]), limit=args.limit,
+                sort_by=rng.choice(['relevance', 'price_low', 'value'])
+            )
+        elapsed = time.perf_counter() - start
+        print(json.dumps({
+            'by': args.by,
+            'queries': args.queries,
+            'seconds': round(elapsed, 3),
+            'throughput_qps': round(args.queries / elapsed, 1),
+            'shards': coordinator.stats()
+        }, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded TravelExplorer knowledge base")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    partition_parser = commands.add_parser('partition', help="split a knowledge base into shards")
+    partition_parser.add_argument('kb', nargs='?', default='travel_kb.pl')
+    partition_parser.add_argument('--shards', type=int, default=4)
+    partition_parser.add_argument('--by', choices=SCHEMES, default='continent')
+    partition_parser.add_argument('--out', default='shards')
+    partition_parser.set_defaults(func=partition_command)
+
+    node_parser = commands.add_parser('node', help="serve one shard")
+    node_parser.add_argument('kb')
+    node_parser.add_argument('--host', default='127.0.0.1')
+    node_parser.add_argument('--port', type=int, default=9100)
+    node_parser.add_argument('--engine', action='store_true', help="consult SWI-Prolog up front")
+    node_parser.set_defaults(func=node_command)
+
+    search_parser = commands.add_parser('search', help="scatter one query over running nodes")
+    search_parser.add_argument('--manifest', default=os.path.join('shards', MANIFEST_NAME))
+    search_parser.add_argument('--nodes', required=True, help="host:port per shard, in manifest order")
+    search_parser.add_argument('--continent')
+    search_parser.add_argument('--type')
+    search_parser.add_argument('--budget', type=float)
+    search_parser.add_argument('--limit', type=int, default=20)
+    search_parser.add_argument('--sort-by', dest='sort_by')
+    search_parser.add_argument('--month')
+    search_parser.set_defaults(func=search_command)
+
+    local_parser = commands.add_parser('local', help="run shards as local processes and load them")
+    local_parser.add_argument('kb', nargs='?', default='travel_kb.pl')
+    local_parser.add_argument('--shards', type=int, default=4)
+    local_parser.add_argument('--by', choices=SCHEMES, default='continent')
+    local_parser.add_argument('--out', default=None, help="shard directory (default: shards/ next to the KB)")
+    local_parser.add_argument('--queries', type=int, default=1000)
+    local_parser.add_argument('--limit', type=int, default=20)
+    local_parser.add_argument('--seed', type=int, default=0)
+    local_parser.add_argument('--engine', action='store_true', help="consult SWI-Prolog up front")
+    local_parser.set_defaults(func=local_command)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""Precompiled binary snapshots of the travel knowledge base facts
+
+    python travel_snapshot.py build travel_kb.pl            # writes travel_kb.kbs
+    python travel_snapshot.py info travel_kb.kbs
+
+Layout (little endian, sections 8-byte aligned):
+
+    header     magic, format version, SHA-256 of the .pl source, section table
+    strings    (count + 1) u64 offsets into a UTF-8 blob; every atom is stored once
+    dest       fixed-width records: name, country, continent, type, cost
+    seasons    (destination, season) string id pairs in KB order
+    spans      (destination, offset, length) into the activity item array
+    items      activity string ids
+    budgets    (level, min, max) records
+    clauses    string ids of the non-fact clauses (rules, directives)
+
+Snapshots are a fast decode format, not shared memory: the file is read
+in one call and decoded into ordinary KnowledgeFacts with no tokenizing.
+Each process builds its own indexes from the decoded facts.
+"""
+import argparse
+import hashlib
+import os
+import struct
+import sys
+
+from travel_facts import KnowledgeFacts, parse_facts
+
+MAGIC = b'TKBS'
+FORMAT_VERSION = 1
+
+# Numbers are stored as a kind byte plus an 8-byte int64/float64 slot
+_INT = 0
+_FLOAT = 1
+
+_HEADER = struct.Struct('<4sHH32s8Q8Q')
+_DEST = struct.Struct('<4IB3x8s')
+_SEASON = struct.Struct('<2I')
+_SPAN = struct.Struct('<3I')
+_ITEM = struct.Struct('<I')
+_BUDGET = struct.Struct('<IB3x8sB3x8s')
+_OFFSET = struct.Struct('<Q')
+
+SECTIONS = ('strings', 'dest', 'seasons', 'spans', 'items', 'budgets', 'clauses', 'blob')
+
+
+def snapshot_path_for(kb_path):
+    """Default snapshot location next to a .pl file"""
+    return os.path.splitext(kb_path)[0] + '.kbs'
+
+
+def source_digest(kb_path):
+    with open(kb_path, 'rb') as f:
+        return hashlib.sha256(f.read()).digest()
+
+
+def _pack_number(value):
+    if isinstance(value, int):
+        return _INT, struct.pack('<q', value)
+    return _FLOAT, struct.pack('<d', value)
+
+
+def _unpack_number(kind, slot):
+    if kind == _INT:
+        return struct.unpack('<q', slot)[0]
+    return struct.unpack('<d', slot)[0]
+
+
+class _StringTable:
+    def __init__(self):
+        self.ids = {}
+        self.values = []
+
+    def __call__(self, value):
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return string_id
+
+
+def _pad(buffer):
+    buffer.extend(b'\0' * (-len(buffer) % 8))
+
+
+def compile_snapshot(kb_path, out_path=None):
+    """Compile the ground facts of kb_path into a binary snapshot"""
+    out_path = out_path or snapshot_path_for(kb_path)
+    with open(kb_path, 'rb') as f:
+        source = f.read()
+    facts = parse_facts(source.decode('utf-8').replace('\r\n', '\n'))
+    intern = _StringTable()
+
+    sections = {}
+    dest = bytearray()
+    for d in facts.destinations:
+        kind, slot = _pack_number(d['cost'])
+        dest += _DEST.pack(intern(d['name']), intern(d['country']), intern(d['continent']),
+                           intern(d['type']), kind, slot)
+    sections['dest'] = (len(facts.destinations), dest)
+
+    seasons = bytearray()
+    count = 0
+    for name, values in facts.best_seasons.items():
+        for season in values:
+            seasons += _SEASON.pack(intern(name), intern(season))
+            count += 1
+    sections['seasons'] = (count, seasons)
+
+    # One span per activities/2 fact; a name with several facts has several spans
+    spans = bytearray()
+    items = bytearray()
+    item_count = 0
+    span_count = 0
+    for name, lists in facts.activity_facts.items():
+        for values in lists:
+            spans += _SPAN.pack(intern(name), item_count, len(values))
+            for activity in values:
+                items += _ITEM.pack(intern(activity))
+            item_count += len(values)
+            span_count += 1
+    sections['spans'] = (span_count, spans)
+    sections['items'] = (item_count, items)
+
+    budgets = bytearray()
+    for level, low, high in facts.budget_levels:
+        budgets += _BUDGET.pack(intern(level), *_pack_number(low), *_pack_number(high))
+    sections['budgets'] = (len(facts.budget_levels), budgets)
+
+    clauses = bytearray()
+    for clause in facts.other_clauses:
+        clauses += _ITEM.pack(intern(clause))
+    sections['clauses'] = (len(facts.other_clauses), clauses)
+
+    offsets = bytearray()
+    blob = bytearray()
+    for value in intern.values:
+        offsets += _OFFSET.pack(len(blob))
+        blob += value.encode('utf-8')
+    offsets += _OFFSET.pack(len(blob))
+    sections['strings'] = (len(intern.values), offsets)
+    sections['blob'] = (len(blob), blob)
+
+    body = bytearray()
+    counts = []
+    starts = []
+    for section in SECTIONS:
+        count, data = sections[section]
+        _pad(body)
+        starts.append(_HEADER.size + len(body))
+        counts.append(count)
+        body += data
+
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, 0, hashlib.sha256(source).digest(), *counts, *starts)
+    tmp_path = out_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(body)
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+class Snapshot:
+    """Snapshot file read into memory"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._data = f.read()
+        self._view = memoryview(self._data)
+        if len(self._data) < _HEADER.size:
+            self.close()
+            raise ValueError(f"{path} is not a knowledge base snapshot")
+        fields = _HEADER.unpack_from(self._data, 0)
+        magic, version, _, self.source_digest = fields[:4]
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a knowledge base snapshot")
+        if version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"{path} has snapshot format {version}, expected {FORMAT_VERSION}")
+        self.counts = dict(zip(SECTIONS, fields[4:12]))
+        self.starts = dict(zip(SECTIONS, fields[12:20]))
+        self._strings = None
+
+    def close(self):
+        self._view.release()
+        self._data = b''
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _records(self, section, record):
+        start = self.starts[section]
+        return record.iter_unpack(self._view[start:start + self.counts[section] * record.size])
+
+    def strings(self):
+        """Decode the string table once; every fact shares these str objects"""
+        if self._strings is None:
+            count = self.counts['strings']
+            start = self.starts['strings']
+            offsets = [offset for offset, in _OFFSET.iter_unpack(self._view[start:start + (count + 1) * _OFFSET.size])]
+            blob = self._view[self.starts['blob']:self.starts['blob'] + self.counts['blob']]
+            self._strings = [str(blob[offsets[i]:offsets[i + 1]], 'utf-8') for i in range(count)]
+        return self._strings
+
+    def facts(self):
+        """Decode the snapshot into KnowledgeFacts"""
+        strings = self.strings()
+        facts = KnowledgeFacts()
+        facts.destinations = [
+            {
+                'name': strings[name],
+                'country': strings[country],
+                'continent': strings[continent],
+                'type': strings[dest_type],
+                'cost': _unpack_number(kind, slot)
+            }
+            for name, country, continent, dest_type, kind, slot in self._records('dest', _DEST)
+        ]
+        for name, season in self._records('seasons', _SEASON):
+            facts.best_seasons.setdefault(strings[name], []).append(strings[season])
+        items = [strings[item] for item, in self._records('items', _ITEM)]
+        for name, offset, length in self._records('spans', _SPAN):
+            facts.add('activities', [strings[name], items[offset:offset + length]])
+        facts.budget_levels = [
+            (strings[level], _unpack_number(low_kind, low), _unpack_number(high_kind, high))
+            for level, low_kind, low, high_kind, high in self._records('budgets', _BUDGET)
+        ]
+        facts.other_clauses = [strings[clause] for clause, in self._records('clauses', _ITEM)]
+        return facts
+
+
+def load_snapshot(path, kb_path=None):
+    """Load facts from a snapshot, refusing one that is stale relative to kb_path"""
+    with Snapshot(path) as snapshot:
+        if kb_path is not None and snapshot.source_digest != source_digest(kb_path):
+            raise ValueError(f"{path} is stale: {kb_path} has changed since it was built")
+        try:
+            return snapshot.facts()
+        except (struct.error, IndexError, UnicodeDecodeError) as e:
+            raise ValueError(f"{path} is corrupt: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or inspect knowledge base snapshots")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build_parser = commands.add_parser('build', help="compile a .pl file into a snapshot")
+    build_parser.add_argument('kb', nargs='?', default='travel_kb.pl')
+    build_parser.add_argument('-o', '--output', default=None)
+    info_parser = commands.add_parser('info', help="describe a snapshot")
+    info_parser.add_argument('snapshot', nargs='?', default='travel_kb.kbs')
+    info_parser.add_argument('--kb', default=None, help="check the snapshot against this .pl file")
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        out_path = compile_snapshot(args.kb, args.output)
+        print(f"Wrote {out_path} ({os.path.getsize(out_path)} bytes)")
+        return
+    with Snapshot(args.snapshot) as snapshot:
+        for section in SECTIONS:
+            print(f"{section:>8}: {snapshot.counts[section]}")
+        print(f"  source: {snapshot.source_digest.hex()}")
+        if args.kb:
+            fresh = snapshot.source_digest == source_digest(args.kb)
+            print(f"   fresh: {fresh}")
+            if not fresh:
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
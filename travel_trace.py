@@ -0,0 +1,247 @@
+"""Lightweight tracing for the search and rendering hot paths
+
+    TRAVEL_TRACE=1 TRAVEL_TRACE_FILE=trace.json python travel_agent_tkinter.py
+
+Tracing is off unless TRAVEL_TRACE is set to something other than 0. While
+off, span() hands back a shared no-op context manager and count() returns
+straight away, so instrumented code pays one attribute check per call.
+
+Finished spans go to a bounded ring buffer that can be exported as JSON
+lines or as a Chrome trace (chrome://tracing, Perfetto). Spans and counts
+recorded while a search is active are also summed per stage into that
+search's record; the last few records feed the GUI debug panel (F12).
+"""
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'args', 'start')
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer._record(self.name, self.start, time.perf_counter_ns() - self.start, self.args)
+        return False
+
+
+class _Activation:
+    __slots__ = ('local', 'record', 'previous')
+
+    def __init__(self, local, record):
+        self.local = local
+        self.record = record
+
+    def __enter__(self):
+        self.previous = getattr(self.local, 'search', None)
+        self.local.search = self.record
+        return self.record
+
+    def __exit__(self, *exc):
+        self.local.search = self.previous
+        return False
+
+
+class SearchTrace:
+    """Per-stage totals for one search, which may span several threads"""
+
+    def __init__(self, label):
+        self.label = label
+        self.started = time.time()
+        self.start_ns = time.perf_counter_ns()
+        self.total_ms = None
+        self.stages = {}
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def add_span(self, name, duration_ns):
+        with self._lock:
+            stage = self.stages.setdefault(name, [0.0, 0])
+            stage[0] += duration_ns / 1e6
+            stage[1] += 1
+
+    def add_count(self, name, n):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + n
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'label': self.label,
+                'started': self.started,
+                'total_ms': self.total_ms,
+                'stages': {name: {'ms': round(ms, 3), 'calls': calls} for name, (ms, calls) in self.stages.items()},
+                'counts': dict(self.counts)
+            }
+
+
+class Tracer:
+    def __init__(self, enabled=False, capacity=100000, history=20):
+        self.enabled = enabled
+        self.events = deque(maxlen=capacity)
+        self.counters = {}
+        self.searches = deque(maxlen=history)
+        # Called with each finished SearchTrace, e.g. to refresh the debug panel
+        self.listeners = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter_ns()
+
+    def span(self, name, **args):
+        """Context manager timing one stage"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args)
+
+    def count(self, name, n=1):
+        """Add n to a named counter (Prolog solutions, cards rendered, ...)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+        record = getattr(self._local, 'search', None)
+        if record is not None:
+            record.add_count(name, n)
+
+    def traced(self, name=None):
+        """Decorator wrapping every call of a function in a span"""
+        def decorate(func):
+            label = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Span(self, label, {}):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def _record(self, name, start_ns, duration_ns, args):
+        thread = threading.current_thread()
+        # deque.append is atomic, so worker threads need no lock here
+        self.events.append((name, start_ns, duration_ns, thread.ident, thread.name, args))
+        record = getattr(self._local, 'search', None)
+        if record is not None:
+            record.add_span(name, duration_ns)
+
+    def start_search(self, label):
+        """Open a per-search record, or None while tracing is off"""
+        if not self.enabled:
+            return None
+        record = SearchTrace(label)
+        self.searches.append(record)
+        return record
+
+    def activate(self, record):
+        """Attribute spans on this thread to record until the block exits"""
+        if record is None:
+            return _NULL_SPAN
+        return _Activation(self._local, record)
+
+    def finish_search(self, record):
+        if record is None:
+            return
+        record.total_ms = round((time.perf_counter_ns() - record.start_ns) / 1e6, 3)
+        for listener in list(self.listeners):
+            listener(record)
+
+    def clear(self):
+        self.events.clear()
+        self.searches.clear()
+        with self._lock:
+            self.counters.clear()
+
+    def export_jsonl(self, path):
+        """One JSON object per span, then one per search and the counters"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for name, start, duration, tid, thread_name, args in list(self.events):
+                f.write(json.dumps({
+                    'type': 'span',
+                    'name': name,
+                    'ts_us': (start - self._origin) / 1000,
+                    'dur_us': duration / 1000,
+                    'thread': thread_name,
+                    'args': args
+                }) + "\n")
+            for record in list(self.searches):
+                f.write(json.dumps(dict(record.as_dict(), type='search')) + "\n")
+            with self._lock:
+                f.write(json.dumps({'type': 'counters', 'counters': dict(self.counters)}) + "\n")
+        return path
+
+    def export_chrome(self, path):
+        """Chrome trace event format, loadable in chrome://tracing or Perfetto"""
+        pid = os.getpid()
+        events = []
+        threads = {}
+        for name, start, duration, tid, thread_name, args in list(self.events):
+            threads[tid] = thread_name
+            events.append({
+                'name': name,
+                'cat': name.split('.')[0],
+                'ph': 'X',
+                'ts': (start - self._origin) / 1000,
+                'dur': duration / 1000,
+                'pid': pid,
+                'tid': tid,
+                'args': args
+            })
+        for tid, thread_name in threads.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                           'args': {'name': thread_name}})
+        with self._lock:
+            counters = dict(self.counters)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms',
+                       'otherData': {'counters': counters}}, f)
+        return path
+
+    def export(self, path):
+        """Chrome trace for .json paths, JSON lines otherwise"""
+        if path.endswith('.json'):
+            return self.export_chrome(path)
+        return self.export_jsonl(path)
+
+
+def format_search(record):
+    """Multi-line text summary of one SearchTrace for the debug panel"""
+    data = record.as_dict()
+    lines = [f"{time.strftime('%H:%M:%S', time.localtime(data['started']))}  {data['label']}"
+             f"  total {data['total_ms'] if data['total_ms'] is not None else '...'} ms"]
+    for name, stage in sorted(data['stages'].items(), key=lambda item: -item[1]['ms']):
+        lines.append(f"    {name:<28} {stage['ms']:>10.3f} ms  x{stage['calls']}")
+    for name, value in sorted(data['counts'].items()):
+        lines.append(f"    # {name:<26} {value:>10}")
+    return "\n".join(lines)
+
+
+tracer = Tracer(enabled=os.environ.get('TRAVEL_TRACE', '0') not in ('', '0'))
+
+if tracer.enabled and os.environ.get('TRAVEL_TRACE_FILE'):
+    atexit.register(tracer.export, os.environ['TRAVEL_TRACE_FILE'])
@@ -0,0 +1,27 @@
+"""Helpers shared by the multiprocess front ends
+
+travel_server.py and travel_batch.py run one SimpleTravelAgent per pool
+worker process: pass init_worker as the pool initializer and reach the
+agent through worker_agent(). percentile() summarizes latencies for the
+load test, the benchmarks and the shard coordinator.
+"""
+from travel_agent_tkinter import SimpleTravelAgent
+
+# Agent owned by each worker process
+_agent = None
+
+
+def init_worker(kb_path, fast_path=False):
+    global _agent
+    _agent = SimpleTravelAgent(kb_path, fast_path=fast_path)
+
+
+def worker_agent():
+    """This worker process's agent, set up by init_worker"""
+    return _agent
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]